@@ -1,16 +1,23 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from qiskit import QuantumCircuit, transpile
+from qiskit import QuantumCircuit
 from qiskit_experiments.framework import ParallelExperiment
 from qiskit_experiments.library import StateTomography
-from qiskit_aer import AerSimulator
 from qiskit.qasm2 import dumps
 from typing import Tuple, Dict, List, Optional
 from qiskit.quantum_info import DensityMatrix, partial_trace
-from qiskit.circuit.library import UnitaryGate
 import numpy as np
 
+from result_cache import RESULT_CACHE, SIMULATOR_SEED, circuit_key
+from counts_array import CountsArray
+from gate_registry import InvalidGate, append_gates
+from backends import SimulatorName, get_simulator
+from transpile_cache import TRANSPILE_CACHE, cached_transpile
+from jobs import JobManager, JobQueueFull, JobStoreUnavailable, jobs_router
+
 # Try importing qiskit-experiments (recommended). If not available, we'll fallback.
 try:
     from qiskit_experiments.library import StateTomography
@@ -19,7 +26,18 @@ except Exception:
     HAS_QISKIT_EXPERIMENTS = False
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Pick up jobs a previous process accepted but never finished
+    JOBS.recover()
+    yield
+    JOBS.shutdown()
+
+
+# Background /run jobs (large-shot tomography can take a while)
+JOBS = JobManager("qiskit1")
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -28,6 +46,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(InvalidGate)
+async def invalid_gate(request, exc: InvalidGate):
+    # Bad gate payloads (unknown name, qubit out of range, missing angle, ...)
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
 class ComplexNumber(BaseModel):
     re: float
     im: float
@@ -46,38 +71,16 @@ class CircuitRequest(BaseModel):
     gates: list[Gate]
     initialStates: list[int] | None = None
     targetQubit : int | None = None
-
-def decode_complex_matrix(mat: List[List["ComplexNumber"]]) -> np.ndarray:
-    rows, cols = len(mat), len(mat[0])
-    out = np.zeros((rows, cols), dtype=complex)
-    for i in range(rows):
-        for j in range(cols):
-            out[i, j] = complex(mat[i][j].re, mat[i][j].im)
-    return out
-
+    # A backends.SIMULATOR_CONFIGS name; this service only runs on Aer
+    backend: SimulatorName = "simulator"
 
 def serialize_rho(rho: np.ndarray):
     """Convert a density matrix with complex numbers to JSON-safe format."""
     return [[{"re": float(np.real(val)), "im": float(np.imag(val))} for val in row] for row in rho]
 
 def _ensure_backend(backend=None):
-    """Return AerSimulator if backend is not provided."""
-    return backend or AerSimulator()
-
-
-def _counts_bit_for_qubit(counts: Dict[str, int], n_qubits: int, target: int) -> Tuple[float, float]:
-    """Compute probabilities P(0), P(1) for target qubit given counts dict."""
-    total, c0 = 0, 0
-    for bitstr, cnt in counts.items():
-        total += cnt
-        rev = bitstr[::-1]  # reverse bitstring so index matches qubit
-        if rev[target] == '0':
-            c0 += cnt
-    if total == 0:
-        return 0.0, 0.0
-    p0 = c0 / total
-    p1 = 1.0 - p0
-    return p0, p1
+    """Return the shared default AerSimulator if backend is not provided."""
+    return backend or get_simulator()
 
 
 def _expectation_from_probs(p0: float, p1: float) -> float:
@@ -125,14 +128,14 @@ def reconstruct_single_qubit_rho_manual(base_qc: QuantumCircuit,
         circuits.append(_make_meas_circuit_variant(base_qc, target, basis))
         bases.append(basis)
 
-    tcirc = transpile(circuits, backend=backend)
-    result = backend.run(tcirc, shots=shots).result()
+    tcirc = cached_transpile(circuits, backend)
+    result = backend.run(tcirc, shots=shots, seed_simulator=SIMULATOR_SEED).result()
 
     exps = {}
     for idx, basis in enumerate(bases):
-        counts = result.get_counts(idx)
-        p0, p1 = _counts_bit_for_qubit(counts, n, target)
-        exps[basis] = _expectation_from_probs(p0, p1)
+        counts = CountsArray.from_aer(result, idx, tcirc[idx].num_clbits)
+        p0, p1 = counts.qubit_probabilities([target])
+        exps[basis] = _expectation_from_probs(p0[0], p1[0])
 
     x, y, z = exps["X"], exps["Y"], exps["Z"]
     rho = _reconstruct_rho_from_xyz(x, y, z)
@@ -161,7 +164,7 @@ def reconstruct_single_qubit_rho_experiments(base_qc: QuantumCircuit,
     tomo = StateTomography(base_qc, measuremnt_qubits[target])
 
     # Run experiment — ExperimentData object is returned
-    exp_data = tomo.run(backend, shots=shots).block_for_results()
+    exp_data = tomo.run(backend, shots=shots, seed_simulator=SIMULATOR_SEED).block_for_results()
 
     # Try to extract a density matrix from the experiment analysis results.
     # Different versions of qiskit-experiments expose results differently; try a few reasonable access patterns.
@@ -218,30 +221,6 @@ def reconstruct_single_qubit_rho_experiments(base_qc: QuantumCircuit,
     z = np.real(rho_mat[0, 0] - rho_mat[1, 1])
     return float(x), float(y), float(z), rho_mat
 
-def apply_gate(qc: QuantumCircuit, gate: Gate):
-    g, p, a = gate.type, gate.params, gate.angle
-
-    if g == "X": qc.x(p[0])
-    elif g == "Y": qc.y(p[0])
-    elif g == "Z": qc.z(p[0])
-    elif g == "H": qc.h(p[0])
-    elif g == "S": qc.s(p[0])
-    elif g == "Sdg": qc.sdg(p[0])
-    elif g == "T": qc.t(p[0])
-    elif g == "Tdg": qc.tdg(p[0])
-    elif g == "Rx": qc.rx(a, p[0])
-    elif g == "Ry": qc.ry(a, p[0])
-    elif g == "Rz": qc.rz(a, p[0])
-    elif g == "Phase": qc.p(a, p[0])
-    elif g == "CNOT": qc.cx(p[0], p[1])
-    elif g == "CZ": qc.cz(p[0], p[1])
-    elif g == "SWAP": qc.swap(p[0], p[1])
-    elif g == "CCNOT": qc.ccx(p[0], p[1], p[2])
-
-    else:
-        raise ValueError(f"Unsupported gate: {gate}")
-
-
 def build_circuit(data: CircuitRequest):
     n = data.numQubits
     if n<6:
@@ -257,84 +236,7 @@ def build_circuit(data: CircuitRequest):
         for idx, state in enumerate(data.initialStates):
             if int(state) == 1:
                 qc.x(idx)
-    for gate in data.gates:
-        g, p, a = gate.type, gate.params, gate.angle
-        if g == "X": qc.x(p[0])
-        elif g == "Y": qc.y(p[0])
-        elif g == "Z": qc.z(p[0])
-        elif g == "H": qc.h(p[0])
-        elif g == "S": qc.s(p[0])
-        elif g == "Sdg": qc.sdg(p[0])
-        elif g == "T": qc.t(p[0])
-        elif g == "Tdg": qc.tdg(p[0])
-        elif g == "Rx": qc.rx(a, p[0])
-        elif g == "Ry": qc.ry(a, p[0])
-        elif g == "Rz": qc.rz(a, p[0])
-        elif g == "Phase": qc.p(a, p[0])
-        elif g == "CNOT": qc.cx(p[0], p[1])
-        elif g == "CZ": qc.cz(p[0], p[1])
-        elif g == "SWAP": qc.swap(p[0], p[1])
-        elif g == "CCNOT": qc.ccx(p[0], p[1], p[2])
-        elif g == "CUSTOM" and gate.customType == "CUSTOM_MATRIX":
-            matrix_np = decode_complex_matrix(gate.matrix)
-            unitary = UnitaryGate(matrix_np, label=gate.name)
-            qc.append(unitary, p)
-        elif g == "CUSTOM" and gate.customType == "CUSTOM_CIRCUIT":
-            # Find how many qubits the subcircuit needs
-            max_qubit = -1
-            for sg in gate.subGates or []:
-                if sg.params:
-                    max_qubit = max(max_qubit, max(sg.params))
-            num_sub_qubits = max_qubit + 1 if max_qubit >= 0 else len(p)
-
-            sub_qc = QuantumCircuit(num_sub_qubits)
-
-            for sg in gate.subGates or []:
-                apply_gate(sub_qc, sg)  # ✅ now sub_qc has correct size
-
-            qc.compose(sub_qc, p, inplace = True)
-        elif g == "CUSTOM" and gate.customType == "CUSTOM_CONTROL":
-            if not gate.subGates or len(gate.subGates) != 1:
-                raise ValueError("CUSTOM_CONTROL must wrap exactly one subGate")
-            
-            sg = gate.subGates[0]
-
-            # Frontend supplies exact qubit indices: last = target, rest = controls
-            ctrl_qubits = p[:-1]
-            target_qubit = p[-1]
-
-            # Validate qubits are within circuit range
-            all_qubits = ctrl_qubits + [target_qubit]
-            if any(q >= data.numQubits or q < 0 for q in all_qubits):
-                raise ValueError(f"Control or target qubit out of range: {all_qubits}")
-
-            # Apply native multi-controlled gates
-            if sg.type == "X":
-                qc.mcx(ctrl_qubits, target_qubit)
-            elif sg.type == "Y":
-                qc.mcy(ctrl_qubits, target_qubit)
-            elif sg.type == "Z":
-                qc.mcz(ctrl_qubits, target_qubit)
-            elif sg.type == "H":
-                qc.mch(ctrl_qubits, target_qubit)
-            elif sg.type == "Rx":
-                qc.mcrx(sg.angle, ctrl_qubits, target_qubit)
-            elif sg.type == "Ry":
-                qc.mcry(sg.angle, ctrl_qubits, target_qubit)
-            elif sg.type == "Rz":
-                qc.mcrz(sg.angle, ctrl_qubits, target_qubit)
-            elif sg.type == "Phase":
-                qc.mcp(sg.angle, ctrl_qubits, target_qubit)
-            elif sg.type == "S":
-                # S gate controlled: apply as phase pi/2
-                qc.mcp(np.pi/2, ctrl_qubits, target_qubit)
-            elif sg.type == "T":
-                # T gate controlled: apply as phase pi/4
-                qc.mcp(np.pi/4, ctrl_qubits, target_qubit)
-        else:
-            raise ValueError(f"Unsupported controlled single-qubit gate: {sg.type}")
-
-
+    append_gates(qc, data.gates)
 
     # ✅ Always measure all qubits at the end
     if(n<6):
@@ -373,11 +275,41 @@ def home():
 
 @app.post("/run")
 def run_circuit(request: CircuitRequest):
+    # Simulator runs are seeded, so identical requests give identical results
+    key = circuit_key(request.numQubits, request.initialStates, request.gates)
+    return RESULT_CACHE.get_or_compute(
+        "artifact", (key, "run", request.targetQubit, request.backend), lambda: _run_circuit(request)
+    )
+
+
+@app.post("/jobs", status_code=202)
+def submit_job(request: CircuitRequest):
+    """
+    Queues /run in the background and returns at once. Poll GET /jobs/{id}
+    or follow GET /jobs/{id}/events (server-sent events).
+    """
+    try:
+        job = JOBS.submit("run", request.model_dump(exclude_unset=True))
+    except (JobQueueFull, JobStoreUnavailable) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {**job, "events": f"/jobs/{job['id']}/events"}
+
+
+JOBS.register("run", lambda payload: run_circuit(CircuitRequest(**payload)))
+app.include_router(jobs_router(JOBS))
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {**RESULT_CACHE.stats(), "transpile": TRANSPILE_CACHE.stats()}
+
+
+def _run_circuit(request: CircuitRequest):
     if(request.numQubits<6):
         qc = build_circuit(request)
-        backend = AerSimulator()
-        qc = transpile(qc, backend)
-        job = backend.run(qc, shots=1024)
+        backend = get_simulator(request.backend)
+        qc = cached_transpile(qc, backend)
+        job = backend.run(qc, shots=1024, seed_simulator=SIMULATOR_SEED)
         result = job.result()
         counts = result.get_counts()
 
@@ -387,8 +319,8 @@ def run_circuit(request: CircuitRequest):
         }
     else:
         qc = build_circuit(request)
-        backend = AerSimulator()
-        qc = transpile(qc, backend)
+        backend = get_simulator(request.backend)
+        qc = cached_transpile(qc, backend)
             # Preferred path: qiskit-experiments
         try:
             if HAS_QISKIT_EXPERIMENTS:
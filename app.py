@@ -1,26 +1,48 @@
-import matplotlib
-matplotlib.use("Agg")
-
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header
 from pydantic import BaseModel
-from typing import List, Optional
-import matplotlib.pyplot as plt
-import io, base64
+from typing import Dict, List, Literal, Optional
+import itertools
+import numpy as np
+import base64, os
 from fastapi.middleware.cors import CORSMiddleware
-
-from qiskit.visualization import (
-    plot_histogram,
-    plot_bloch_multivector,
-    plot_state_qsphere,
-    plot_bloch_vector
-)
-from qiskit.quantum_info import Statevector
-from qiskit.visualization import plot_state_city
-import matplotlib.pyplot as plt
-
-from circuit_builder1 import build_circuit, get_all_qubits_bloch_vectors, simulate_counts, get_statevector, get_quantum_outputs,reconstruct_single_qubit_rho,_reconstruct_rho_from_xyz,strip_measurements,plot_statevector_amplitudes, simulate_counts
-
-app = FastAPI(title="Quantum Simulator API")
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from result_cache import RESULT_CACHE, circuit_key
+from backends import BackendName
+from wire_format import STREAM_MEDIA_TYPES, negotiate, encode_arrays
+from render_pool import RENDER_POOL, RenderQueueFull, RenderTimeout
+from image_cache import IMAGE_CACHE
+from transpile_cache import TRANSPILE_CACHE
+from prefix_cache import PREFIX_CACHE
+from method_selector import CircuitTooLarge, select_method
+from gate_registry import InvalidGate
+from jobs import JobManager, JobQueueFull, JobStoreUnavailable, jobs_router
+from metrics import METRICS_ENABLED, TimedRoute, TimingMiddleware, annotate, render_metrics, timed
+from plot_data import histogram_data, amplitudes_data, city_data, qsphere_data
+from circuit_builder1 import build_circuit, get_all_qubits_bloch_vectors, simulate_counts, simulate_counts_batch, run_sweep, payload_statevector, get_quantum_outputs, get_quantum_arrays, density_matrix_block,sparse_amplitudes,reduced_density_matrices,mps_reduced_density_matrices,matrix_to_json,_complex_pairs,reconstruct_single_qubit_rho,reconstruct_all_qubits_bloch,_reconstruct_rho_from_xyz,strip_measurements
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Start the matplotlib/Qiskit render workers before serving traffic
+    RENDER_POOL.warm_up()
+    # Pick up jobs a previous process accepted but never finished
+    JOBS.recover()
+    yield
+    JOBS.shutdown()
+    RENDER_POOL.shutdown()
+
+
+# Background jobs; kinds are registered next to the endpoints they mirror
+JOBS = JobManager("app")
+
+
+app = FastAPI(title="Quantum Simulator API", lifespan=lifespan)
+if METRICS_ENABLED:
+    # Per-stage timings: Server-Timing header and /metrics histograms
+    app.router.route_class = TimedRoute
+    app.add_middleware(TimingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -29,6 +51,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(InvalidGate)
+async def invalid_gate(request, exc: InvalidGate):
+    # Bad gate payloads (unknown name, qubit out of range, missing angle, ...)
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 # ---------- REQUEST MODELS ----------
 
 class ComplexNumber(BaseModel):
@@ -43,169 +71,796 @@ class Gate(BaseModel):
     angle: float | None = None
     matrix: Optional[List[List[ComplexNumber]]] = None
     subGates: Optional[List["Gate"]] = None   # recursive definition for CUSTOM_CIRCUIT
+    param: Optional[str] = None          # /sweep: symbolic angle name, replaces angle
     
 
 
+class MatrixBlock(BaseModel):
+    # Half-open ranges of basis-state indices; stops default to the full size
+    rowStart: int = 0
+    rowStop: Optional[int] = None
+    colStart: int = 0
+    colStop: Optional[int] = None
+
+
 class CircuitPayload(BaseModel):
     numQubits: int
     initialStates: str
     gates: List[Gate]
     targetQubit: int = None
+    includeDensityMatrix: bool = False        # /state-analysis only
+    densityBlock: Optional[MatrixBlock] = None
+    # "data" skips matplotlib and returns the series behind the plot
+    render: Literal["image", "data"] = "image"
+    # A backends.SIMULATOR_CONFIGS name, or "hardware" for IBM Quantum
+    backend: BackendName = "simulator"
+
+
+class AnalyzeRequest(CircuitPayload):
+    # Names match the single-purpose endpoints below
+    artifacts: List[str] = [
+        "circuit",
+        "state-analysis",
+        "bloch",
+        "qsphere",
+        "bloch-all",
+        "counts",
+        "statevectorplot",
+        "statevector",
+    ]
+
+
+class BatchRequest(BaseModel):
+    circuits: List[CircuitPayload]
+    shots: int = 1024
+
+
+class SweepRequest(CircuitPayload):
+    # Parameter name (Gate.param) -> values to evaluate
+    values: Dict[str, List[float]]
+    # "grid": every combination; "zip": the i-th value of every list together
+    mode: Literal["grid", "zip"] = "grid"
+    outputs: List[Literal["counts", "expectations", "statevector"]] = ["expectations"]
+    shots: int = 1024
+
+
+class TomographyRequest(CircuitPayload):
+    shots: int = 1024
+    stderr: bool = False        # add per-qubit standard errors
+
+
+class JobRequest(AnalyzeRequest):
+    # "analyze" runs /analyze, "bloch2" runs /bloch2 (tomography)
+    kind: Literal["analyze", "bloch2"] = "analyze"
+
+
+# ---------- LIMITS ----------
+
+# Largest full density matrix served; bigger circuits must ask for a block
+MAX_DENSITY_QUBITS = int(os.getenv("QSVM_MAX_DENSITY_QUBITS", "8"))
+# Streamed responses (NDJSON, frames) hold only the matrix itself, so allow more
+MAX_STREAM_DENSITY_QUBITS = int(os.getenv("QSVM_MAX_STREAM_DENSITY_QUBITS", "10"))
+
+# Circuits accepted by one /batch request
+MAX_BATCH = int(os.getenv("QSVM_MAX_BATCH", "1000"))
+
+# Points evaluated by one /sweep request
+MAX_SWEEP_POINTS = int(os.getenv("QSVM_MAX_SWEEP_POINTS", "1024"))
+
+# Amplitudes in one sparse /state-analysis page (also the top_k limit)
+MAX_STATE_PAGE = int(os.getenv("QSVM_MAX_STATE_PAGE", "65536"))
 
 
 # ---------- UTIL ----------
 
-def fig_to_base64(fig):
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png")
-    plt.close(fig)
-    return base64.b64encode(buf.getvalue()).decode()
+def render_base64(specs, keys):
+    """
+    Base64 PNGs for (kind, data, options) plot specs, in order. Each spec
+    has an IMAGE_CACHE key; only the misses are rendered (in the pool).
+    """
+    images = [IMAGE_CACHE.get(key) for key in keys]
+    missing = [i for i, png in enumerate(images) if png is None]
+    if missing:
+        try:
+            with timed("render"):
+                rendered = RENDER_POOL.render_many([specs[i] for i in missing])
+        except (RenderQueueFull, RenderTimeout) as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        for i, png in zip(missing, rendered):
+            IMAGE_CACHE.put(keys[i], png)
+            images[i] = png
+    with timed("base64"):
+        return [base64.b64encode(png).decode() for png in images]
+
+
+def image_base64(circuit_key, kind, data, options=None, variant=None):
+    """
+    One cached plot. ``variant`` tells apart images of the same circuit and
+    kind that are drawn from different data (a qubit index, a counts hash).
+    """
+    key = IMAGE_CACHE.key(circuit_key, kind, options, variant)
+    return render_base64([(kind, data, options)], [key])[0]
+
 
+def density_block_slices(payload: CircuitPayload, max_qubits=MAX_DENSITY_QUBITS):
+    """
+    Validated (rows, cols) slices of the requested density matrix block,
+    or None when the payload did not ask for the density matrix.
+    """
+    if not payload.includeDensityMatrix:
+        return None
+    return checked_density_slices(payload.numQubits, payload.densityBlock, max_qubits)
 
 
-# ---------- ENDPOINTS ----------
+def checked_density_slices(num_qubits, block=None, max_qubits=MAX_DENSITY_QUBITS):
+    """(rows, cols) slices of a density matrix block, refused past the limit."""
+    dim = 2 ** num_qubits
+    block = block or MatrixBlock()
+    r0, c0 = block.rowStart, block.colStart
+    r1 = dim if block.rowStop is None else min(block.rowStop, dim)
+    c1 = dim if block.colStop is None else min(block.colStop, dim)
 
-@app.post("/statevectorplot")
-def statevector_endpoint(payload: CircuitPayload):
-    # Build circuit
-    qc = build_circuit(payload.numQubits, payload.initialStates, payload.gates)
+    if not (0 <= r0 < r1 and 0 <= c0 < c1):
+        raise HTTPException(status_code=400, detail="Empty or invalid densityBlock")
 
-    # Get statevector
-    state = get_statevector(qc)
+    entries = (r1 - r0) * (c1 - c0)
+    max_entries = 4 ** max_qubits  # a full max_qubits-qubit density matrix
+    if entries > max_entries:
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"Density matrix block has {entries} entries, the limit is "
+                f"{max_entries} ({max_qubits} qubits)"
+            ),
+        )
+    return slice(r0, r1), slice(c0, c1)
 
-    # Plot statevector
-    fig = plot_statevector_amplitudes(state)
 
-    # Convert to Base64 and return
-    return {"image": fig_to_base64(fig)}
 
-@app.post("/counts")
-def counts_endpoint(payload: CircuitPayload):
+# ---------- SIMULATION METHOD ----------
+
+def simulation_method(payload: CircuitPayload) -> str:
+    """method_selector.select_method for the payload; 413 if nothing fits."""
+    try:
+        return select_method(payload.numQubits, payload.gates)
+    except CircuitTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+def effective_backend(payload: CircuitPayload) -> str:
+    """payload.backend, with the automatic "simulator" run as "mps" past the dense budget."""
+    if payload.backend == "simulator" and simulation_method(payload) == "matrix_product_state":
+        return "mps"
+    return payload.backend
+
+
+# ---------- ARTIFACTS ----------
+
+class ArtifactContext:
     """
-    Returns measurement counts and a counts histogram.
-    This represents classical measurement statistics, NOT the quantum state.
+    One payload shared by every artifact of a request. The circuit is built
+    and simulated lazily, at most once, and only if some artifact is not
+    already cached.
     """
-    # Build circuit (includes measurements)
-    qc = build_circuit(
-        payload.numQubits,
-        payload.initialStates,
-        payload.gates
+
+    def __init__(self, payload: CircuitPayload):
+        self.payload = payload
+        self.key = circuit_key(payload.numQubits, payload.initialStates, payload.gates)
+        annotate(payload.numQubits, len(payload.gates))
+        self._qc = None
+        self._state = None
+        self._rhos = None
+        self._method = None
+
+    @property
+    def qc(self):
+        if self._qc is None:
+            with timed("build"):
+                self._qc = build_circuit(
+                    self.payload.numQubits,
+                    self.payload.initialStates,
+                    self.payload.gates
+                )
+        return self._qc
+
+    @property
+    def method(self):
+        if self._method is None:
+            self._method = simulation_method(self.payload)
+        return self._method
+
+    @property
+    def backend(self):
+        if self.payload.backend == "simulator" and self.method == "matrix_product_state":
+            return "mps"
+        return self.payload.backend
+
+    @property
+    def state(self):
+        if self.method != "statevector":
+            raise HTTPException(
+                status_code=413,
+                detail=(
+                    f"{self.payload.numQubits} qubits are past the dense statevector "
+                    "budget; only counts, Bloch vectors and reduced density "
+                    "matrices are available"
+                ),
+            )
+        if self._state is None:
+            # Resumes from the longest cached gate prefix; no circuit needed
+            with timed("simulate"):
+                self._state = payload_statevector(
+                    self.payload.numQubits,
+                    self.payload.initialStates,
+                    self.payload.gates,
+                    self.key,
+                )
+        return self._state
+
+    @property
+    def rhos(self):
+        """Single-qubit reduced density matrices, from MPS when no dense state fits."""
+        if self._rhos is None:
+            if self.method == "statevector":
+                state = self.state
+                with timed("partial_trace"):
+                    self._rhos = reduced_density_matrices(state)
+            else:
+                qc = self.qc
+                with timed("simulate"):
+                    self._rhos = mps_reduced_density_matrices(qc)
+        return self._rhos
+
+
+def circuit_artifact(ctx):
+    # Draw circuit as matplotlib figure
+    return {"image": image_base64(ctx.key, "circuit", ctx.qc)}
+
+
+def state_analysis_artifact(ctx):
+    block = density_block_slices(ctx.payload)
+    if ctx.method == "statevector" or block is not None:
+        qc, state = ctx.qc, ctx.state
+        with timed("analyze"):
+            return get_quantum_outputs(qc, state, block)
+    # Matrix product state: no statevector to return, reduced states only
+    return {
+        "reduced_density_matrices": {
+            f"qubit_{q}": matrix_to_json(rho) for q, rho in enumerate(ctx.rhos)
+        }
+    }
+
+
+def bloch_artifact(ctx):
+    if ctx.payload.render == "data":
+        return {"data": {"bloch_vectors": get_all_qubits_bloch_vectors(ctx.qc, rhos=ctx.rhos)}}
+    return {"image": image_base64(ctx.key, "bloch_multivector", ctx.state.data)}
+
+
+def qsphere_artifact(ctx):
+    if ctx.payload.render == "data":
+        return {"data": qsphere_data(ctx.state)}
+    return {"image": image_base64(ctx.key, "qsphere", ctx.state.data)}
+
+
+def bloch_all_artifact(ctx):
+    # Compute Bloch vectors using partial trace
+    bloch_vectors = get_all_qubits_bloch_vectors(ctx.qc, rhos=ctx.rhos)
+    if ctx.payload.render == "data":
+        return {"bloch_vectors": bloch_vectors}
+
+    # Plot each Bloch sphere (in parallel across render workers)
+    rendered = render_base64(
+        [("bloch_vector", vec, None) for vec in bloch_vectors.values()],
+        [IMAGE_CACHE.key(ctx.key, "bloch_vector", variant=qubit) for qubit in bloch_vectors],
     )
+    images = dict(zip(bloch_vectors, rendered))
 
-    # Run measurement (default backend logic inside simulate_counts)
-    counts = simulate_counts(qc)
+    # Return all images + raw vectors
+    return {
+        "bloch_vectors": bloch_vectors,
+        "images": images
+    }
 
-    # Plot counts histogram
-    fig = plot_histogram(counts)
 
+def counts_artifact(ctx):
+    # Run measurement on the requested backend
+    qc = ctx.qc
+    with timed("counts"):
+        counts = simulate_counts(
+            qc, backend_mode=ctx.backend, key=ctx.key, state=lambda: ctx.state
+        ).to_dict()
+    if ctx.payload.render == "data":
+        return {"data": histogram_data(counts), "counts": counts}
+
+    # Plot counts histogram
     return {
-        "image": fig_to_base64(fig),
+        "image": image_base64(
+            ctx.key, "histogram", counts, variant=sorted(counts.items())
+        ),
         "counts": counts
     }
 
-@app.post("/histogram")
-def histogram(payload: CircuitPayload):
-    qc = build_circuit(payload.numQubits, payload.initialStates, payload.gates)
-    counts = simulate_counts(qc)
-    fig = plot_histogram(counts)
-    return {"image": fig_to_base64(fig),
-            "counts": counts}
 
-@app.post("/statevector")
-def statevector(payload: CircuitPayload):
-    # Build circuit (with measurements)
-    qc = build_circuit(
-        payload.numQubits,
-        payload.initialStates,
-        payload.gates
+def statevectorplot_artifact(ctx):
+    if ctx.payload.render == "data":
+        return {"data": amplitudes_data(ctx.state)}
+    return {"image": image_base64(ctx.key, "statevector_amplitudes", ctx.state.data)}
+
+
+def statevector_artifact(ctx):
+    if ctx.payload.render == "data":
+        # City bars are the full density matrix, so the size limit applies
+        rows, cols = checked_density_slices(ctx.payload.numQubits)
+        return {"data": city_data(density_matrix_block(ctx.state, rows, cols))}
+    # Plot state_city
+    return {"image": image_base64(ctx.key, "state_city", ctx.state.data)}
+
+
+ARTIFACTS = {
+    "circuit": circuit_artifact,
+    "state-analysis": state_analysis_artifact,
+    "bloch": bloch_artifact,
+    "qsphere": qsphere_artifact,
+    "bloch-all": bloch_all_artifact,
+    "counts": counts_artifact,
+    "statevectorplot": statevectorplot_artifact,
+    "statevector": statevector_artifact,
+}
+
+# Payload fields, besides the circuit itself, that change an artifact
+ARTIFACT_OPTIONS = {
+    "state-analysis": ("includeDensityMatrix", "densityBlock"),
+    "bloch": ("render",),
+    "qsphere": ("render",),
+    "bloch-all": ("render",),
+    "counts": ("render", "backend"),
+    "statevectorplot": ("render",),
+    "statevector": ("render",),
+}
+
+# Deterministic artifacts; counts only when they come from a seeded simulator
+CACHEABLE_ARTIFACTS = set(ARTIFACTS) - {"counts"}
+
+
+def is_cacheable(ctx, name):
+    if name == "counts":
+        return ctx.payload.backend != "hardware"
+    return name in CACHEABLE_ARTIFACTS
+
+
+def artifact_cache_key(ctx, name):
+    options = tuple(
+        repr(getattr(ctx.payload, field)) for field in ARTIFACT_OPTIONS.get(name, ())
     )
+    return (ctx.key, name, options)
 
-    # Remove measurements for statevector
-    qc_sv = strip_measurements(qc)
 
-    # Compute statevector
-    state = Statevector.from_instruction(qc_sv)
+def check_artifacts(names):
+    unknown = [a for a in names if a not in ARTIFACTS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown artifacts: {unknown}")
 
-    # Plot state_city
-    fig = plot_state_city(state)
 
-    # Convert to base64
-    image_base64 = fig_to_base64(fig)
-    plt.close(fig)
+def run_artifacts(payload: CircuitPayload, names):
+    """Returns {name: artifact}, serving repeats from RESULT_CACHE."""
+    ctx = ArtifactContext(payload)
+    results = {}
+    for name in dict.fromkeys(names):
+        cacheable = is_cacheable(ctx, name)
+        key = artifact_cache_key(ctx, name)
+        result = RESULT_CACHE.get("artifact", key) if cacheable else None
+        if result is None:
+            result = ARTIFACTS[name](ctx)
+            if cacheable:
+                RESULT_CACHE.put("artifact", key, result)
+        results[name] = result
+    return results
 
+
+# ---------- ENDPOINTS ----------
+
+@app.post("/analyze")
+def analyze(payload: AnalyzeRequest):
+    """
+    Builds and simulates the circuit once and returns every requested
+    artifact, keyed by artifact name.
+    """
+    check_artifacts(payload.artifacts)
+    return run_artifacts(payload, payload.artifacts)
+
+
+@app.post("/jobs", status_code=202)
+def submit_job(payload: JobRequest):
+    """
+    Queues /analyze or /bloch2 to run in the background and returns at once.
+    Poll GET /jobs/{id} or follow GET /jobs/{id}/events (server-sent events).
+    """
+    if payload.kind == "analyze":
+        check_artifacts(payload.artifacts)
+    try:
+        job = JOBS.submit(payload.kind, payload.model_dump(exclude_unset=True, exclude={"kind"}))
+    except (JobQueueFull, JobStoreUnavailable) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {**job, "events": f"/jobs/{job['id']}/events"}
+
+
+app.include_router(jobs_router(JOBS))
+
+
+@app.post("/batch")
+def batch(payload: BatchRequest):
+    """
+    Counts for many circuits at once: one backend job per distinct backend,
+    so Aer parallelizes across experiments. results[i] answers circuits[i]
+    with either "counts" or an "error" for that item alone.
+    """
+    if len(payload.circuits) > MAX_BATCH:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BATCH} circuits per batch"
+        )
+
+    results = [None] * len(payload.circuits)
+    groups = {}  # backend -> [(index, circuit)]
+    for i, item in enumerate(payload.circuits):
+        try:
+            qc = build_circuit(item.numQubits, item.initialStates, item.gates)
+            backend = effective_backend(item)
+        except HTTPException as e:
+            results[i] = {"error": {"status_code": e.status_code, "detail": e.detail}}
+            continue
+        except Exception as e:
+            results[i] = {"error": {"status_code": 400, "detail": str(e)}}
+            continue
+        groups.setdefault(backend, []).append((i, qc))
+
+    for backend, items in groups.items():
+        try:
+            outcomes = simulate_counts_batch([qc for _, qc in items], payload.shots, backend)
+        except Exception as e:
+            outcomes = [e] * len(items)
+        for (i, _), outcome in zip(items, outcomes):
+            if isinstance(outcome, Exception):
+                results[i] = {"error": {"status_code": 500, "detail": str(outcome)}}
+            else:
+                results[i] = {"counts": outcome.to_dict()}
+    return {"results": results}
+
+
+@app.post("/sweep")
+def sweep(payload: SweepRequest):
+    """
+    Evaluates a circuit whose gates name symbolic angles (Gate.param) at
+    every point of ``values``: built and transpiled once, bound in bulk.
+    results[i] belongs to points[i] (values ordered like "parameters").
+    """
+    annotate(payload.numQubits, len(payload.gates))
+    # Sweeps bind into dense Aer runs only; there is no MPS variant
+    if simulation_method(payload) != "statevector":
+        raise HTTPException(
+            status_code=413,
+            detail=f"{payload.numQubits} qubits are too many for a dense simulation sweep",
+        )
+    parameters = {}
+    with timed("build"):
+        qc = build_circuit(
+            payload.numQubits, payload.initialStates, payload.gates, parameters=parameters
+        )
+    names = list(payload.values)
+    if set(names) != set(parameters):
+        raise HTTPException(
+            status_code=400,
+            detail=f"values must cover exactly the circuit parameters {sorted(parameters)}",
+        )
+
+    columns = [payload.values[name] for name in names]
+    if payload.mode == "zip":
+        if len({len(c) for c in columns}) > 1:
+            raise HTTPException(status_code=400, detail="zip mode needs equal-length value lists")
+        points = list(zip(*columns))
+    else:
+        points = list(itertools.product(*columns))
+    if len(points) > MAX_SWEEP_POINTS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_SWEEP_POINTS} points per sweep"
+        )
+
+    def compute():
+        return {
+            "parameters": names,
+            "points": [list(p) for p in points],
+            "results": run_sweep(
+                qc, names, points, payload.outputs, payload.shots, payload.backend
+            ),
+        }
+
+    if payload.backend == "hardware":
+        return compute()
+    # Seeded simulator sweeps repeat exactly (e.g. a slider dragged back)
+    key = (
+        circuit_key(payload.numQubits, payload.initialStates, payload.gates),
+        "sweep",
+        repr((names, points, sorted(set(payload.outputs)), payload.shots, payload.backend)),
+    )
+    return RESULT_CACHE.get_or_compute("artifact", key, compute)
+
+
+@app.get("/cache/stats")
+def cache_stats():
     return {
-        "image": image_base64
+        **RESULT_CACHE.stats(),
+        "images": IMAGE_CACHE.stats(),
+        "transpile": TRANSPILE_CACHE.stats(),
+        "prefix": PREFIX_CACHE.stats(),
     }
 
 
-@app.post("/circuit")
-def circuit_diagram(payload: CircuitPayload):
-    qc = build_circuit(
-        payload.numQubits,
-        payload.initialStates,
-        payload.gates
+def _gauges():
+    """(name, help, {label pairs: value}) for /metrics, from the stats endpoints."""
+    result = RESULT_CACHE.stats()
+    images = IMAGE_CACHE.stats()
+    transpile = TRANSPILE_CACHE.stats()
+    prefix = PREFIX_CACHE.stats()
+    jobs = JOBS.stats()
+
+    lookups = {}
+    for kind, counts in result["kinds"].items():
+        lookups[(("cache", "result"), ("kind", kind), ("result", "hit"))] = counts["hits"]
+        lookups[(("cache", "result"), ("kind", kind), ("result", "miss"))] = counts["misses"]
+    lookups[(("cache", "transpile"), ("kind", "circuit"), ("result", "hit"))] = transpile["hits"]
+    lookups[(("cache", "transpile"), ("kind", "circuit"), ("result", "miss"))] = transpile["misses"]
+    lookups[(("cache", "prefix"), ("kind", "statevector"), ("result", "hit"))] = prefix["resumed"]
+    lookups[(("cache", "prefix"), ("kind", "statevector"), ("result", "miss"))] = (
+        prefix["lookups"] - prefix["resumed"]
     )
 
-    # Draw circuit as matplotlib figure
-    fig = qc.draw(output="mpl")
+    result_hits = sum(c["hits"] for c in result["kinds"].values())
+    result_lookups = result_hits + sum(c["misses"] for c in result["kinds"].values())
+    return [
+        ("qsvm_cache_lookups", "Cache lookups so far, by outcome.", lookups),
+        ("qsvm_cache_hit_ratio", "Hits over lookups so far.", {
+            (("cache", "result"),): result_hits / result_lookups if result_lookups else 0.0,
+            (("cache", "image"),): images["hit_rate"],
+            (("cache", "transpile"),): transpile["hit_rate"],
+            (("cache", "prefix"),): prefix["resumed"] / prefix["lookups"] if prefix["lookups"] else 0.0,
+        }),
+        ("qsvm_cache_bytes", "Memory held by each cache.", {
+            (("cache", "result"),): result["bytes"],
+            (("cache", "image"),): images["memory_bytes"],
+            (("cache", "prefix"),): prefix["bytes"],
+        }),
+        ("qsvm_render_in_flight", "Plots queued or rendering in the render pool.", {
+            (): RENDER_POOL.stats()["in_flight"],
+        }),
+        ("qsvm_jobs", "Background jobs owned by this process, by status.", {
+            (("status", "queued"),): jobs["queued"],
+            (("status", "running"),): jobs["running"],
+        }),
+    ]
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus text format: request and per-stage duration histograms
+    (labelled by endpoint, qubit count and gate-count bucket), cache hit
+    rates and queue depths.
+    """
+    return PlainTextResponse(
+        render_metrics(_gauges()), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/render/stats")
+def render_stats():
+    return RENDER_POOL.stats()
+
+
+@app.post("/statevectorplot")
+def statevector_endpoint(payload: CircuitPayload):
+    return run_artifacts(payload, ["statevectorplot"])["statevectorplot"]
+
+@app.post("/counts")
+def counts_endpoint(payload: CircuitPayload, accept: Optional[str] = Header(None)):
+    """
+    Returns measurement counts and a counts histogram.
+    This represents classical measurement statistics, NOT the quantum state.
+    Binary Accept types get outcome indices and counts as arrays, no image.
+    """
+    media_type = negotiate(accept)
+    if media_type is None:
+        return run_artifacts(payload, ["counts"])["counts"]
+
+    ctx = ArtifactContext(payload)
+    counts = simulate_counts(
+        ctx.qc, backend_mode=ctx.backend, key=ctx.key, state=lambda: ctx.state
+    )
+    arrays = {"outcomes": counts.outcomes, "counts": counts.freqs}
+    return encode_arrays(arrays, media_type)
+
+@app.post("/histogram")
+def histogram(payload: CircuitPayload):
+    return run_artifacts(payload, ["counts"])["counts"]
 
-    return {"image": fig_to_base64(fig)}
+@app.post("/statevector")
+def statevector(payload: CircuitPayload):
+    return run_artifacts(payload, ["statevector"])["statevector"]
 
-# @app.post("/bloch")
-# def bloch(payload: CircuitPayload):
-#     qc = build_circuit(payload.numQubits, payload.initialStates, payload.gates)
-#     psi = get_statevector(qc)
-#     fig = plot_bloch_multivector(psi)
-#     return {"image": fig_to_base64(fig)}
+
+@app.post("/circuit")
+def circuit_diagram(payload: CircuitPayload):
+    return run_artifacts(payload, ["circuit"])["circuit"]
+
+@app.post("/bloch")
+def bloch_multivector(payload: CircuitPayload):
+    return run_artifacts(payload, ["bloch"])["bloch"]
 
 
 @app.post("/bloch2")
 def bloch(payload: CircuitPayload):
     qc = build_circuit(payload.numQubits, payload.initialStates, payload.gates)
-    bloch_vector = reconstruct_single_qubit_rho(qc, payload.targetQubit)
+    bloch_vector = reconstruct_single_qubit_rho(
+        qc,
+        payload.targetQubit,
+        backend_mode=effective_backend(payload),
+        dense=simulation_method(payload) == "statevector",
+    )
     
-    fig = plot_bloch_vector(bloch_vector)
-    img_base64 = fig_to_base64(fig)
     rho = _reconstruct_rho_from_xyz(*bloch_vector)
     rho_serializable = [
         [{"re": c.real, "im": c.imag} for c in row]
         for row in rho
     ]
+    result = {"density_matrix": rho_serializable, "bloch_vector": bloch_vector}
+
+    if payload.render == "image":
+        key = circuit_key(payload.numQubits, payload.initialStates, payload.gates)
+        result["image"] = image_base64(key, "bloch_vector", bloch_vector, variant=bloch_vector)
+    return result
 
-    return {"image": img_base64, "density_matrix": rho_serializable, "bloch_vector": bloch_vector}
+@app.post("/tomography")
+def tomography(payload: TomographyRequest):
+    """
+    Measured (not ideal) Bloch vector of every qubit from three circuit
+    executions: all qubits measured in X, in Y and in Z.
+    """
+    annotate(payload.numQubits, len(payload.gates))
+
+    def compute():
+        with timed("build"):
+            qc = build_circuit(payload.numQubits, payload.initialStates, payload.gates)
+        with timed("simulate"):
+            vectors, errors = reconstruct_all_qubits_bloch(
+                qc, payload.shots, effective_backend(payload), payload.stderr
+            )
+        qubits = [f"qubit_{q}" for q in range(payload.numQubits)]
+        result = {"bloch_vectors": dict(zip(qubits, vectors.tolist()))}
+        if errors is not None:
+            result["stderr"] = dict(zip(qubits, errors.tolist()))
+        if payload.render == "image":
+            rendered = render_base64(
+                [("bloch_vector", vec, None) for vec in vectors.tolist()],
+                [IMAGE_CACHE.key(key, "bloch_vector", variant=vec) for vec in vectors.tolist()],
+            )
+            result["images"] = dict(zip(qubits, rendered))
+        return result
+
+    key = circuit_key(payload.numQubits, payload.initialStates, payload.gates)
+    if payload.backend == "hardware":
+        return compute()
+    cache_key = (key, "tomography", payload.shots, payload.backend, payload.stderr, payload.render)
+    return RESULT_CACHE.get_or_compute("artifact", cache_key, compute)
 
 @app.post("/bloch-all")
 def bloch_all_qubits(payload: CircuitPayload):
-    # 1. Build circuit
-    qc = build_circuit(
-        payload.numQubits,
-        payload.initialStates,
-        payload.gates
-    )
-
-    # 2. Compute Bloch vectors using partial trace
-    bloch_vectors = get_all_qubits_bloch_vectors(qc)
-
-    # 3. Plot each Bloch sphere
-    images = {}
-    for qubit, vec in bloch_vectors.items():
-        fig = plot_bloch_vector(vec)
-        images[qubit] = fig_to_base64(fig)
-
-    # 4. Return all images + raw vectors
-    return {
-        "bloch_vectors": bloch_vectors,
-        "images": images
-    }
+    return run_artifacts(payload, ["bloch-all"])["bloch-all"]
 
 @app.post("/qsphere")
 def qsphere(payload: CircuitPayload):
-    qc = build_circuit(payload.numQubits, payload.initialStates, payload.gates)
-    psi = get_statevector(qc)
-    fig = plot_state_qsphere(psi)
-    return {"image": fig_to_base64(fig)}
+    return run_artifacts(payload, ["qsphere"])["qsphere"]
+
+def checked_sparse_options(num_qubits, threshold, top_k, cursor, limit):
+    dim = 2 ** num_qubits
+    if threshold is not None and threshold < 0:
+        raise HTTPException(status_code=400, detail="threshold must be >= 0")
+    if top_k is not None and not 1 <= top_k <= MAX_STATE_PAGE:
+        raise HTTPException(status_code=400, detail=f"top_k must be 1..{MAX_STATE_PAGE}")
+    if top_k is not None and (cursor or limit is not None):
+        raise HTTPException(status_code=400, detail="top_k cannot be combined with cursor/limit")
+    if not 0 <= cursor < dim:
+        raise HTTPException(status_code=400, detail=f"cursor must be 0..{dim - 1}")
+    if limit is not None and not 1 <= limit <= MAX_STATE_PAGE:
+        raise HTTPException(status_code=400, detail=f"limit must be 1..{MAX_STATE_PAGE}")
+    return limit or MAX_STATE_PAGE
+
+
+def sparse_state_analysis(ctx, threshold, top_k, cursor, limit, max_density_qubits):
+    """state-analysis arrays with selected (index, amplitude) pairs, not all 2^n."""
+    limit = checked_sparse_options(ctx.payload.numQubits, threshold, top_k, cursor, limit)
+    indices, amplitudes, next_cursor = sparse_amplitudes(
+        ctx.state, threshold, top_k, cursor, limit
+    )
+    arrays = {
+        "indices": indices.astype(np.int64),
+        "amplitudes": amplitudes,
+        "reduced_density_matrices": ctx.rhos,
+    }
+    block = density_block_slices(ctx.payload, max_density_qubits)
+    if block is not None:
+        arrays["density_matrix"] = density_matrix_block(ctx.state, *block)
+    return arrays, next_cursor
+
 
 @app.post("/state-analysis")
-def state_analysis(payload: CircuitPayload):
-    qc = build_circuit(payload.numQubits, payload.initialStates, payload.gates)
-    return get_quantum_outputs(qc)
+def state_analysis(
+    payload: CircuitPayload,
+    accept: Optional[str] = Header(None),
+    array: Optional[str] = None,
+    dtype: str = "complex128",
+    threshold: Optional[float] = None,
+    top_k: Optional[int] = None,
+    cursor: int = 0,
+    limit: Optional[int] = None,
+):
+    """
+    JSON by default. With a binary Accept type (see wire_format) the raw
+    arrays are sent instead; ``array`` picks one for single-array formats
+    and ``dtype`` is complex64 or complex128.
+
+    ``threshold`` (minimum |amplitude|), ``top_k`` (most probable first) and
+    ``cursor``/``limit`` (pages in basis-state order) return only selected
+    amplitudes, as (index, [re, im]) pairs, or "indices" and "amplitudes"
+    arrays in binary form. ``next_cursor`` (X-Next-Cursor) fetches the
+    next page.
+
+    The application/x-ndjson and application/x-qsvm-frames types stream
+    the arrays in chunks (see wire_format) and allow full density matrices
+    up to MAX_STREAM_DENSITY_QUBITS.
+    """
+    media_type = negotiate(accept)
+    max_density_qubits = (
+        MAX_STREAM_DENSITY_QUBITS if media_type in STREAM_MEDIA_TYPES else MAX_DENSITY_QUBITS
+    )
+    if any(v is not None for v in (threshold, top_k, limit)) or cursor:
+        ctx = ArtifactContext(payload)
+        arrays, next_cursor = sparse_state_analysis(
+            ctx, threshold, top_k, cursor, limit, max_density_qubits
+        )
+        if media_type is not None:
+            response = encode_arrays(arrays, media_type, dtype, array)
+            if next_cursor is not None:
+                response.headers["X-Next-Cursor"] = str(next_cursor)
+            return response
+        result = {
+            "statevector": {
+                "dimension": 2 ** payload.numQubits,
+                "amplitudes": [
+                    [i, pair] for i, pair in zip(
+                        arrays["indices"].tolist(), _complex_pairs(arrays["amplitudes"])
+                    )
+                ],
+                "next_cursor": next_cursor,
+            },
+            "reduced_density_matrices": {
+                f"qubit_{q}": matrix_to_json(rho)
+                for q, rho in enumerate(arrays["reduced_density_matrices"])
+            },
+        }
+        if "density_matrix" in arrays:
+            result["density_matrix"] = matrix_to_json(arrays["density_matrix"])
+        return result
+
+    if media_type is None:
+        return run_artifacts(payload, ["state-analysis"])["state-analysis"]
+
+    ctx = ArtifactContext(payload)
+    block = density_block_slices(payload, max_density_qubits)
+    if ctx.method == "statevector" or block is not None:
+        arrays = get_quantum_arrays(ctx.qc, ctx.state, block)
+    else:
+        arrays = {"reduced_density_matrices": ctx.rhos}
+    return encode_arrays(arrays, media_type, dtype, array)
+
+
+JOBS.register("analyze", lambda payload: analyze(AnalyzeRequest(**payload)))
+JOBS.register("bloch2", lambda payload: bloch(CircuitPayload(**payload)))
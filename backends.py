@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+from typing import Literal
+
+from dotenv import load_dotenv
+
+load_dotenv()  # loads .env
+
+IBM_API_KEY = os.getenv("IBM_API_KEY")
+IBM_CHANNEL = os.getenv("IBM_CHANNEL", "ibm_cloud")
+IBM_INSTANCE = os.getenv("IBM_INSTANCE", "open-instance")
+
+# "ibm" talks to IBM Quantum on first hardware use; "local" never touches
+# the network and runs "hardware" jobs on fake backends through Aer. Local
+# is opt-in only: a missing IBM_API_KEY must fail, not quietly fake results
+RUNTIME_PROVIDER = os.getenv("QSVM_RUNTIME_PROVIDER", "ibm")
+
+# How long a least_busy() pick is reused before asking IBM again
+HARDWARE_REFRESH_SECONDS = float(os.getenv("QSVM_HARDWARE_REFRESH_SECONDS", "300"))
+
+# Threads per Aer job (0 = Aer decides, i.e. all cores)
+AER_THREADS = int(os.getenv("QSVM_AER_THREADS", "0"))
+
+# Named simulator configurations; each name maps to one shared AerSimulator
+SIMULATOR_CONFIGS = {
+    "simulator": {"method": "automatic"},
+    "statevector": {"method": "statevector"},
+    "statevector_single": {"method": "statevector", "precision": "single"},
+    "mps": {"method": "matrix_product_state"},
+}
+
+# Values accepted in the "backend" field of request payloads
+SimulatorName = Literal[tuple(SIMULATOR_CONFIGS)]
+BackendName = Literal[tuple(SIMULATOR_CONFIGS) + ("hardware",)]
+
+
+class LocalRuntimeService:
+    """
+    Offline stand-in for QiskitRuntimeService. least_busy() hands out
+    qiskit_ibm_runtime fake backends (device snapshots with noise models),
+    which Sampler runs locally in its local testing mode.
+    """
+
+    # Smallest first, so small circuits get a small device to transpile to
+    FAKE_BACKENDS = ("FakeManilaV2", "FakeGuadalupeV2", "FakeKolkataV2", "FakeSherbrooke")
+
+    def __init__(self):
+        self._backends = {}
+
+    def backend(self, name: str):
+        if name not in self._backends:
+            from qiskit_ibm_runtime import fake_provider
+
+            self._backends[name] = getattr(fake_provider, name)()
+        return self._backends[name]
+
+    def least_busy(self, min_num_qubits=None, simulator=False, operational=True, **kwargs):
+        for name in self.FAKE_BACKENDS:
+            backend = self.backend(name)
+            if backend.num_qubits >= (min_num_qubits or 0):
+                return backend
+        raise ValueError(f"No local backend with {min_num_qubits} qubits")
+
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_runtime_service():
+    """Process-wide runtime service, created on first use (not at import)."""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            if RUNTIME_PROVIDER == "local":
+                _SERVICE = LocalRuntimeService()
+            else:
+                from qiskit_ibm_runtime import QiskitRuntimeService
+
+                _SERVICE = QiskitRuntimeService(
+                    channel=IBM_CHANNEL, token=IBM_API_KEY, instance=IBM_INSTANCE
+                )
+        return _SERVICE
+
+
+_SIMULATORS = {}
+_SIMULATORS_LOCK = threading.Lock()
+
+
+def get_simulator(name: str = "simulator"):
+    """Shared, preconfigured AerSimulator for a SIMULATOR_CONFIGS name."""
+    with _SIMULATORS_LOCK:
+        if name not in _SIMULATORS:
+            if name not in SIMULATOR_CONFIGS:
+                raise ValueError(f"Unknown simulator: {name}")
+            from qiskit_aer import AerSimulator
+
+            _SIMULATORS[name] = AerSimulator(
+                **SIMULATOR_CONFIGS[name], max_parallel_threads=AER_THREADS
+            )
+        return _SIMULATORS[name]
+
+
+_HARDWARE = {}  # min_num_qubits -> (backend, picked_at)
+_HARDWARE_LOCK = threading.Lock()
+
+
+def get_hardware_backend(min_num_qubits=None):
+    """least_busy() device, reused for HARDWARE_REFRESH_SECONDS."""
+    with _HARDWARE_LOCK:
+        cached = _HARDWARE.get(min_num_qubits)
+        if cached is not None and time.monotonic() - cached[1] < HARDWARE_REFRESH_SECONDS:
+            return cached[0]
+
+    backend = get_runtime_service().least_busy(
+        min_num_qubits=min_num_qubits, simulator=False, operational=True
+    )
+    with _HARDWARE_LOCK:
+        _HARDWARE[min_num_qubits] = (backend, time.monotonic())
+    return backend
+
+
+def get_sampler(backend):
+    from qiskit_ibm_runtime import Sampler
+
+    return Sampler(mode=backend)
@@ -0,0 +1,330 @@
+"""
+Offline benchmark of the request pipeline: generated circuits (1-24 qubits,
+several depths and gate mixes) are timed stage by stage (parse, build,
+transpile, simulate, analyze, render, encode) with peak memory per stage.
+Simulator only; nothing touches IBM Quantum.
+
+    python benchmark.py --quick                          # small grid
+    python benchmark.py --output bench.json              # full grid, JSON
+    python benchmark.py --save-baseline                  # store a baseline
+    python benchmark.py --baseline benchmark_baseline.json
+
+With a baseline, any stage slower or hungrier than it by more than the
+tolerance is reported and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Never reach for IBM Quantum, and render in this process
+os.environ.setdefault("QSVM_RUNTIME_PROVIDER", "local")
+os.environ.setdefault("QSVM_RENDER_WORKERS", "0")
+
+import numpy as np
+import qiskit
+from fastapi.encoders import jsonable_encoder
+from qiskit import transpile
+
+from app import CircuitPayload
+from backends import get_simulator
+from circuit_builder1 import (
+    build_circuit,
+    get_all_qubits_bloch_vectors,
+    get_quantum_arrays,
+    get_quantum_outputs,
+    prefix_statevector,
+)
+from prefix_cache import PREFIX_CACHE
+from render_pool import render_png
+from wire_format import NPZ, encode_arrays
+
+STAGES = ("parse", "build", "transpile", "simulate", "analyze", "render", "encode")
+
+QUBITS = (1, 2, 4, 8, 12, 16, 20, 24)
+DEPTHS = (4, 16)
+MIXES = ("clifford", "rotation", "custom")
+QUICK = {"qubits": (1, 4, 8), "depths": (4,), "mixes": MIXES}
+
+# Past these sizes a stage is skipped: JSON analysis of 2^n amplitudes and
+# per-qubit Bloch plots stop being meaningful request paths
+ANALYZE_MAX_QUBITS = 16
+RENDER_MAX_QUBITS = 6
+
+WARMUP_QUBITS = 4
+# Timed runs per stage whenever results are or become a baseline: one run
+# is too noisy to call a regression
+MIN_BASELINE_REPEAT = 3
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+TOLERANCE = 0.25          # relative slowdown / memory growth allowed
+MIN_SECONDS = 0.002       # differences below this are noise
+MIN_BYTES = 1 << 20
+
+
+# ---------- CIRCUITS ----------
+
+def _random_unitary(rng: random.Random, dim: int) -> np.ndarray:
+    z = np.array(
+        [[complex(rng.gauss(0, 1), rng.gauss(0, 1)) for _ in range(dim)] for _ in range(dim)]
+    )
+    q, r = np.linalg.qr(z)
+    return q * (np.diag(r) / np.abs(np.diag(r)))
+
+
+def _matrix_json(u: np.ndarray):
+    return [[{"re": float(c.real), "im": float(c.imag)} for c in row] for row in u]
+
+
+def _layer(rng: random.Random, n: int, mix: str) -> list:
+    """One 1-qubit gate per qubit, then entangling gates over random pairs."""
+    gates = []
+    for q in range(n):
+        if mix == "clifford":
+            gates.append({"type": rng.choice(["H", "S", "SDG", "X", "Z"]), "params": [q]})
+        elif mix == "rotation":
+            gates.append({
+                "type": rng.choice(["RX", "RY", "RZ", "PHASE"]),
+                "params": [q],
+                "angle": rng.uniform(0, 2 * np.pi),
+            })
+        else:
+            gates.append({
+                "type": "CUSTOM",
+                "customType": "CUSTOM_MATRIX",
+                "params": [q],
+                "matrix": _matrix_json(_random_unitary(rng, 2)),
+            })
+
+    qubits = list(range(n))
+    rng.shuffle(qubits)
+    for a, b in zip(qubits[::2], qubits[1::2]):
+        if mix == "clifford":
+            gates.append({"type": rng.choice(["CNOT", "CZ", "SWAP"]), "params": [a, b]})
+        elif mix == "rotation":
+            gates.append({"type": "CNOT", "params": [a, b]})
+        else:
+            gates.append({
+                "type": "CUSTOM",
+                "customType": "CUSTOM_MATRIX",
+                "params": [a, b],
+                "matrix": _matrix_json(_random_unitary(rng, 4)),
+            })
+
+    if mix == "custom" and n >= 3:
+        controls = rng.sample(range(n), min(n, rng.randint(3, 4)))
+        target_type = rng.choice(["X", "RY", "PHASE"])
+        sub = {"type": target_type, "params": [0]}
+        if target_type != "X":
+            sub["angle"] = rng.uniform(0, 2 * np.pi)
+        gates.append({
+            "type": "CUSTOM",
+            "customType": "CUSTOM_CONTROL",
+            "params": controls,
+            "subGates": [sub],
+        })
+        gates.append({"type": "CCNOT", "params": rng.sample(range(n), 3)})
+    return gates
+
+
+def generate_payload(num_qubits: int, depth: int, mix: str) -> dict:
+    """Request payload (as JSON) of ``depth`` layers; the same on every run."""
+    rng = random.Random(f"{mix}-{num_qubits}-{depth}")
+    gates = []
+    for _ in range(depth):
+        gates.extend(_layer(rng, num_qubits, mix))
+    initial = "".join(rng.choice("01") for _ in range(num_qubits))
+    return {"numQubits": num_qubits, "initialStates": initial, "gates": gates}
+
+
+# ---------- MEASUREMENT ----------
+
+def _measure(fn, repeat: int):
+    """(median seconds over ``repeat`` runs, peak traced bytes of one run, result)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    # Separate run: tracing slows Python-heavy stages down
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), peak, result
+
+
+def run_case(raw: dict, repeat: int) -> dict:
+    n = raw["numQubits"]
+    stages = {}
+    out = {}
+
+    def stage(name, fn, skip=None):
+        if skip:
+            stages[name] = {"skipped": skip}
+            return
+        seconds, peak, out[name] = _measure(fn, repeat)
+        stages[name] = {"seconds": seconds, "peak_bytes": peak}
+
+    stage("parse", lambda: CircuitPayload.model_validate(raw))
+    payload = out["parse"]
+    stage("build", lambda: build_circuit(n, payload.initialStates, payload.gates))
+    qc = out["build"]
+    stage("transpile", lambda: transpile(qc, get_simulator()))
+
+    def simulate():
+        PREFIX_CACHE.clear()  # cold: time the simulation, not the cache
+        return prefix_statevector(n, payload.initialStates, payload.gates)
+
+    stage("simulate", simulate)
+    state = out["simulate"]
+
+    too_big = n > ANALYZE_MAX_QUBITS and f"more than {ANALYZE_MAX_QUBITS} qubits"
+    stage(
+        "analyze",
+        lambda: (get_quantum_outputs(qc, state), get_all_qubits_bloch_vectors(qc, state)),
+        skip=too_big,
+    )
+    stage(
+        "render",
+        lambda: (render_png("circuit", qc), render_png("bloch_multivector", state.data)),
+        skip=n > RENDER_MAX_QUBITS and f"more than {RENDER_MAX_QUBITS} qubits",
+    )
+
+    def encode():
+        body = json.dumps(jsonable_encoder(out["analyze"][0])).encode()
+        binary = encode_arrays(get_quantum_arrays(qc, state), NPZ).body
+        return len(body), len(binary)
+
+    stage("encode", encode, skip=too_big)
+    return stages
+
+
+def run_suite(qubits, depths, mixes, repeat: int, log=print) -> dict:
+    # Untimed: the first parse/transpile/render of each gate mix pays one-off
+    # import and setup costs (4 qubits so every gate kind of the mix appears)
+    for mix in mixes:
+        run_case(generate_payload(WARMUP_QUBITS, 1, mix), 1)
+    results = {}
+    for mix in mixes:
+        for depth in depths:
+            for n in qubits:
+                raw = generate_payload(n, depth, mix)
+                case = f"{mix}/q{n}/d{depth}"
+                start = time.perf_counter()
+                results[case] = {
+                    "num_qubits": n,
+                    "depth": depth,
+                    "mix": mix,
+                    "num_gates": len(raw["gates"]),
+                    "stages": run_case(raw, repeat),
+                }
+                log(f"{case:<24} {time.perf_counter() - start:8.2f}s")
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "qiskit": qiskit.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+# ---------- BASELINE ----------
+
+def compare(current: dict, baseline: dict, tolerance=TOLERANCE,
+            min_seconds=MIN_SECONDS, min_bytes=MIN_BYTES) -> list:
+    """Human-readable regressions of ``current`` against ``baseline``."""
+    regressions = []
+    for case, result in current["results"].items():
+        base_case = baseline.get("results", {}).get(case)
+        if base_case is None:
+            continue
+        for name, now in result["stages"].items():
+            before = base_case["stages"].get(name)
+            if before is None or "seconds" not in now or "seconds" not in before:
+                continue
+            for metric, floor, unit in (("seconds", min_seconds, "s"), ("peak_bytes", min_bytes, "B")):
+                a, b = now[metric], before[metric]
+                if a > b * (1 + tolerance) and a - b > floor:
+                    regressions.append(
+                        f"{case} {name} {metric}: {a:.4g}{unit} vs baseline "
+                        f"{b:.4g}{unit} (+{(a / b - 1) * 100 if b else float('inf'):.0f}%)"
+                    )
+    return regressions
+
+
+def print_table(report: dict):
+    print(f"\n{'case':<24}" + "".join(f"{s:>11}" for s in STAGES))
+    for case, result in report["results"].items():
+        cells = []
+        for name in STAGES:
+            entry = result["stages"].get(name, {})
+            cells.append(f"{entry['seconds'] * 1000:9.1f}ms" if "seconds" in entry else f"{'-':>11}")
+        print(f"{case:<24}" + "".join(cells))
+
+
+def _ints(text):
+    return tuple(int(v) for v in text.split(","))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="small grid for a fast check")
+    parser.add_argument("--qubits", type=_ints, help="comma-separated qubit counts")
+    parser.add_argument("--depths", type=_ints, help="comma-separated layer counts")
+    parser.add_argument("--mixes", type=lambda s: tuple(s.split(",")), help=f"subset of {MIXES}")
+    parser.add_argument("--repeat", type=int, help="timed runs per stage, median kept (default 3, 1 with --quick; "
+                        f"at least {MIN_BASELINE_REPEAT} with --baseline/--save-baseline)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help=f"write results as the new baseline (default {DEFAULT_BASELINE})")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    grid = QUICK if args.quick else {"qubits": QUBITS, "depths": DEPTHS, "mixes": MIXES}
+    repeat = args.repeat or (1 if args.quick else 3)
+    if args.baseline or args.save_baseline:
+        repeat = max(repeat, MIN_BASELINE_REPEAT)
+    report = run_suite(
+        args.qubits or grid["qubits"],
+        args.depths or grid["depths"],
+        args.mixes or grid["mixes"],
+        repeat,
+    )
+    print_table(report)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} REGRESSION(S) against {args.baseline}:", file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            return 1
+        print(f"\nno regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,43 +1,27 @@
-from qiskit import QuantumCircuit, transpile
-from qiskit_aer import AerSimulator
-from qiskit.quantum_info import Statevector, DensityMatrix, partial_trace
+from qiskit import ClassicalRegister, QuantumCircuit
+from qiskit.circuit import Gate as QiskitGate
+from qiskit.quantum_info import Statevector, DensityMatrix
 import numpy as np
 from typing import Tuple, Dict, List, Optional
-from qiskit.circuit.library import UnitaryGate
-import matplotlib.pyplot as plt
-from qiskit_ibm_runtime import QiskitRuntimeService, Sampler
-from qiskit.visualization import plot_histogram
-from dotenv import load_dotenv
-import os
+import importlib.util
 
-load_dotenv()  # loads .env
+from result_cache import RESULT_CACHE, SIMULATOR_SEED
+from counts_array import CountsArray
+from gate_registry import append_gates, decode_complex_matrix  # moved; kept importable here
+from transpile_cache import cached_transpile
+from prefix_cache import PREFIX_CACHE, checkpoint_positions, prefix_keys
+import statevector_engine
+from render_pool import plot_statevector_amplitudes  # moved; kept importable here
+from backends import get_hardware_backend, get_sampler, get_simulator
 
-token = os.getenv("IBM_API_KEY")
 
+# qiskit-experiments takes seconds to import, so it is only imported when
+# tomography actually runs
+HAS_QISKIT_EXPERIMENTS = importlib.util.find_spec("qiskit_experiments") is not None
 
-try:
-    from qiskit_experiments.library import StateTomography
-
-    HAS_QISKIT_EXPERIMENTS = True
-except Exception:
-    HAS_QISKIT_EXPERIMENTS = False
-    
-
-# ---------------- IBM Quantum Account Setup ----------------
-from qiskit_ibm_runtime import QiskitRuntimeService
-
-
-QiskitRuntimeService.save_account(
-    channel="ibm_cloud",
-    token= token,
-    instance="open-instance",
-    overwrite=True
-)
-
-# Initialize service (used later by get_execution_backend)
-_IBMQ_SERVICE = QiskitRuntimeService()
-# ----------------------------------------------------------
 
+# IBM Quantum access lives in backends.py: the runtime service is created
+# lazily on the first hardware request, never at import time.
 
 
 class ComplexNumber:
@@ -56,6 +40,7 @@ class Gate:
         customType=None,
         matrix=None,
         subGates=None,
+        param=None,
     ):
         self.type = type
         self.params = params or []
@@ -64,94 +49,33 @@ class Gate:
         self.customType = customType
         self.matrix = matrix
         self.subGates = subGates or []
-
-
-def decode_complex_matrix(mat):
-    rows, cols = len(mat), len(mat[0])
-    out = np.zeros((rows, cols), dtype=complex)
-
-    for i in range(rows):
-        for j in range(cols):
-            c = mat[i][j]
-            out[i, j] = complex(c.re, c.im)
-
-    return out
+        self.param = param
 
 
 def get_execution_backend(
-    backend_mode: str = "hardware",
+    backend_mode: str = "simulator",
+    min_num_qubits: Optional[int] = None,
 ):
     """
+    backend_mode is "hardware" or a backends.SIMULATOR_CONFIGS name.
+
     Returns:
     - exec_backend: object used to RUN circuits
     - backend_type: 'hardware' or 'simulator'
     """
-    if backend_mode == "simulator":
-        return AerSimulator(), "simulator"
-
-    # default: hardware
-    backend = _IBMQ_SERVICE.least_busy(simulator=False, operational=True)
-    return backend, "hardware"
-
-
-def apply_gate(qc: QuantumCircuit, gate):
-    g = gate.type
-    p = gate.params
-    a = gate.angle
-
-    if g == "X":
-        qc.x(p[0])
-
-    elif g == "Y":
-        qc.y(p[0])
+    if backend_mode == "hardware":
+        return get_hardware_backend(min_num_qubits), "hardware"
 
-    elif g == "Z":
-        qc.z(p[0])
+    # Shared, preconfigured AerSimulator (created once per name)
+    return get_simulator(backend_mode), "simulator"
 
-    elif g == "H":
-        qc.h(p[0])
 
-    elif g == "S":
-        qc.s(p[0])
-
-    elif g == "Sdg":
-        qc.sdg(p[0])
-
-    elif g == "T":
-        qc.t(p[0])
-
-    elif g == "Tdg":
-        qc.tdg(p[0])
-
-    elif g == "Rx":
-        qc.rx(a, p[0])
-
-    elif g == "Ry":
-        qc.ry(a, p[0])
-
-    elif g == "Rz":
-        qc.rz(a, p[0])
-
-    elif g == "Phase":
-        qc.p(a, p[0])
-
-    elif g == "CNOT":
-        qc.cx(p[0], p[1])
-
-    elif g == "CZ":
-        qc.cz(p[0], p[1])
-
-    elif g == "SWAP":
-        qc.swap(p[0], p[1])
-
-    elif g == "CCNOT":
-        qc.ccx(p[0], p[1], p[2])
-
-    else:
-        raise ValueError(f"Unsupported gate type: {g}")
-
-
-def build_circuit(num_qubits, initial_states, gates):
+def build_circuit(num_qubits, initial_states, gates, parameters=None):
+    """
+    Circuit for a request payload, measured on every qubit. Pass a dict as
+    ``parameters`` to keep gates with a ``param`` name symbolic; it is
+    filled with the Parameter objects used.
+    """
     qc = QuantumCircuit(num_qubits, num_qubits)
 
     # Initial state
@@ -159,118 +83,7 @@ def build_circuit(num_qubits, initial_states, gates):
         if int(bit) == 1:
             qc.x(idx)
 
-    # Apply gates
-    for gate in gates:
-        g = gate.type.upper()
-        p = gate.params if hasattr(gate, "params") else []
-        a = getattr(gate, "angle", None)
-
-        # Single-qubit gates
-        if g == "X":
-            qc.x(p[0])
-
-        elif g == "Y":
-            qc.y(p[0])
-
-        elif g == "Z":
-            qc.z(p[0])
-
-        elif g == "H":
-            qc.h(p[0])
-
-        elif g == "S":
-            qc.s(p[0])
-
-        elif g == "SDG":
-            qc.sdg(p[0])
-
-        elif g == "T":
-            qc.t(p[0])
-
-        elif g == "TDG":
-            qc.tdg(p[0])
-
-        elif g == "RX":
-            qc.rx(a, p[0])
-
-        elif g == "RY":
-            qc.ry(a, p[0])
-
-        elif g == "RZ":
-            qc.rz(a, p[0])
-
-        elif g == "PHASE":
-            qc.p(a, p[0])
-
-        # Two-qubit gates
-        elif g == "CNOT" or g == "CX":
-            qc.cx(p[0], p[1])
-
-        elif g == "CZ":
-            qc.cz(p[0], p[1])
-
-        elif g == "SWAP":
-            qc.swap(p[0], p[1])
-
-        # Three-qubit gate
-        elif g == "CCNOT" or g == "CCX":
-            qc.ccx(p[0], p[1], p[2])
-
-        # Custom unitary matrix
-        elif g == "CUSTOM" and gate.customType == "CUSTOM_MATRIX":
-            matrix_np = decode_complex_matrix(gate.matrix)
-            unitary = UnitaryGate(matrix_np, label=gate.name)
-            qc.append(unitary, p)
-
-        # Custom sub-circuit
-        elif g == "CUSTOM" and gate.customType == "CUSTOM_CIRCUIT":
-            max_qubit = -1
-            for sg in gate.subGates or []:
-                if sg.params:
-                    max_qubit = max(max_qubit, max(sg.params))
-
-            num_sub_qubits = max_qubit + 1 if max_qubit >= 0 else len(p)
-            sub_qc = QuantumCircuit(num_sub_qubits)
-
-            for sg in gate.subGates or []:
-                apply_gate(sub_qc, sg)
-
-            qc.compose(sub_qc, p, inplace=True)
-
-        # Multi-controlled custom gate
-        elif g == "CUSTOM" and gate.customType == "CUSTOM_CONTROL":
-            if not gate.subGates or len(gate.subGates) != 1:
-                raise ValueError("CUSTOM_CONTROL must wrap exactly one subGate")
-
-            sg = gate.subGates[0]
-            ctrl_qubits = p[:-1]
-            target = p[-1]
-
-            if sg.type == "X":
-                qc.mcx(ctrl_qubits, target)
-            elif sg.type == "Y":
-                qc.mcy(ctrl_qubits, target)
-            elif sg.type == "Z":
-                qc.mcz(ctrl_qubits, target)
-            elif sg.type == "H":
-                qc.mch(ctrl_qubits, target)
-            elif sg.type == "RX":
-                qc.mcrx(sg.angle, ctrl_qubits, target)
-            elif sg.type == "RY":
-                qc.mcry(sg.angle, ctrl_qubits, target)
-            elif sg.type == "RZ":
-                qc.mcrz(sg.angle, ctrl_qubits, target)
-            elif sg.type == "PHASE":
-                qc.mcp(sg.angle, ctrl_qubits, target)
-            elif sg.type == "S":
-                qc.mcp(np.pi / 2, ctrl_qubits, target)
-            elif sg.type == "T":
-                qc.mcp(np.pi / 4, ctrl_qubits, target)
-            else:
-                raise ValueError(f"Unsupported controlled gate: {sg.type}")
-
-        else:
-            raise ValueError(f"Unsupported gate type: {g}")
+    append_gates(qc, gates, parameters)
 
     # Measure all qubits
     qc.measure(range(num_qubits), range(num_qubits))
@@ -284,25 +97,6 @@ def strip_measurements(qc: QuantumCircuit) -> QuantumCircuit:
     return qc_sv
 
 
-def plot_statevector_amplitudes(state):
-    """
-    Plots |ψ⟩ amplitudes as a bar chart.
-    Returns a matplotlib Figure.
-    """
-    amps = state.data
-    num_qubits = int(np.log2(len(amps)))
-    labels = [f"|{i:0{num_qubits}b}⟩" for i in range(len(amps))]
-
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.bar(labels, np.abs(amps))
-    ax.set_title("Statevector Amplitudes |ψ⟩")
-    ax.set_ylabel("Probability Amplitude")
-    ax.set_xlabel("Basis State")
-    plt.xticks(rotation=45)
-
-    return fig
-
-
 # def simulate_counts(qc, shots=1024):
 #     qc_m = qc.copy()
 #     qc_m.measure(range(qc.num_qubits), range(qc.num_qubits))
@@ -313,116 +107,436 @@ def plot_statevector_amplitudes(state):
 #     return result.get_counts()
 
 
-def simulate_counts(qc, shots=1024, backend_mode="hardware"):
-    exec_backend, backend_type = get_execution_backend(backend_mode)
+def ideal_sampling_supported(qc: QuantumCircuit) -> bool:
+    """
+    True when qc is bound unitary gates followed only by measurements, so
+    its counts are a draw from |psi|^2 of the pre-measurement state.
+    """
+    if qc.parameters or qc.num_clbits != qc.num_qubits:
+        return False
+    measured = set()
+    for instruction in qc.data:
+        name = instruction.operation.name
+        qubits = {qc.find_bit(q).index for q in instruction.qubits}
+        if name == "measure":
+            measured |= qubits
+        elif name == "barrier":
+            continue
+        elif measured & qubits or not isinstance(instruction.operation, QiskitGate):
+            return False
+    return True
+
+
+def sample_counts(state, shots=1024, seed=SIMULATOR_SEED):
+    """
+    CountsArray drawn from the probabilities of ``state`` with one seeded
+    multinomial draw.
+    """
+    data = np.asarray(getattr(state, "data", state))
+    num_qubits = int(data.size).bit_length() - 1
+    probs = np.abs(data) ** 2
+    probs /= probs.sum()
+    draws = np.random.default_rng(seed).multinomial(shots, probs)
+    return CountsArray.from_draws(draws, num_qubits)
 
-    qc_m = qc.copy()
-    qc_m.measure(range(qc.num_qubits), range(qc.num_qubits))
+
+def simulate_counts(qc, shots=1024, backend_mode="simulator", key=None, state=None):
+    """
+    Measurement counts for qc, as a CountsArray. Simulator runs use a fixed
+    seed, so when a circuit ``key`` (result_cache.circuit_key) is given
+    they are cached.
+
+    Simulator runs of circuits with only terminal measurements are sampled
+    straight from the statevector instead of running Aer; ``state`` is an
+    optional zero-argument callable returning it (e.g. one already cached).
+    "mps" always runs Aer, since it is used when no dense state fits.
+    """
+    if backend_mode != "hardware" and key is not None:
+        cached = RESULT_CACHE.get("counts", (key, shots, backend_mode))
+        if cached is not None:
+            return cached
+
+    if backend_mode not in ("hardware", "mps") and ideal_sampling_supported(qc):
+        sv = state() if state is not None else get_statevector(qc, key)
+        counts = sample_counts(sv, shots)
+    else:
+        counts = simulate_counts_batch([qc], shots, backend_mode)[0]
+    if isinstance(counts, Exception):
+        raise counts
+    if backend_mode != "hardware" and key is not None:
+        RESULT_CACHE.put("counts", (key, shots, backend_mode), counts)
+    return counts
+
+
+def _bitarray_counts(bitarray, idx=()):
+    """CountsArray of a Sampler BitArray (or of entry idx of a swept one)."""
+    return CountsArray.from_int_counts(bitarray.get_int_counts(idx), bitarray.num_bits)
+
+
+def simulate_counts_batch(circuits, shots=1024, backend_mode="simulator"):
+    """
+    Measurement counts (CountsArray) for several circuits. Simulator
+    circuits with only terminal measurements are sampled from their
+    statevector exactly as simulate_counts does, so both agree; the rest
+    go out in one backend job (one Aer run, or one Sampler job on
+    hardware). Returns a list aligned with ``circuits``; an experiment that
+    failed gets its exception instead.
+
+    Aer seeds experiment i of a job differently from a single run, so only
+    the first Aer-run entry matches simulate_counts for the same circuit.
+    """
+    out = [None] * len(circuits)
+    pending = []
+    for idx, qc in enumerate(circuits):
+        if backend_mode not in ("hardware", "mps") and ideal_sampling_supported(qc):
+            try:
+                out[idx] = sample_counts(get_statevector(qc), shots)
+            except Exception as e:
+                out[idx] = e
+        else:
+            pending.append(idx)
+    if not pending:
+        return out
+
+    exec_backend, backend_type = get_execution_backend(
+        backend_mode, max(circuits[idx].num_qubits for idx in pending)
+    )
+
+    measured = []
+    for idx in pending:
+        qc_m = circuits[idx].copy()
+        qc_m.measure(range(qc_m.num_qubits), range(qc_m.num_qubits))
+        measured.append(qc_m)
 
     if backend_type == "simulator":
-        compiled = transpile(qc_m, exec_backend)
-        result = exec_backend.run(compiled, shots=shots).result()
-        return result.get_counts()
+        compiled = cached_transpile(measured, exec_backend)
+        result = exec_backend.run(
+            compiled, shots=shots, seed_simulator=SIMULATOR_SEED
+        ).result()
+        get_counts = lambda i: CountsArray.from_aer(result, i, measured[i].num_clbits)
+    else:
+        # ---- hardware path (Sampler) ----
+        tqcs = cached_transpile(measured, exec_backend, optimization_level=1)
+        sampler = get_sampler(exec_backend)
+        result = sampler.run(tqcs, shots=shots).result()
+        get_counts = lambda i: _bitarray_counts(next(iter(result[i].data.values())))
 
-    # ---- hardware path (Sampler) ----
-    tqc = transpile(qc_m, exec_backend, optimization_level=1)
-    sampler = Sampler(mode=exec_backend)
-    job = sampler.run([tqc], shots=shots)
-    result = job.result()
+    for i, idx in enumerate(pending):
+        try:
+            out[idx] = get_counts(i)
+        except Exception as e:
+            out[idx] = e
+    return out
 
-    data_bin = result[0].data
-    bitarray = next(iter(data_bin.values()))
-    return bitarray.get_counts()
 
+def run_sweep(qc, names, points, outputs, shots=1024, backend_mode="simulator"):
+    """
+    Evaluates a parameterized circuit (from build_circuit with
+    ``parameters``) at every point, a row of values ordered like ``names``.
+    The circuit is transpiled once and all bindings go out as one job.
+
+    "counts" run on ``backend_mode``; "statevector" and "expectations"
+    (per-qubit <X>, <Y>, <Z>) are exact, as in the other endpoints.
+    Returns one {output: value} dict per point.
+    """
+    points = np.asarray(points, dtype=float).reshape(len(points), len(names))
+    results = [{} for _ in range(len(points))]
+    if not len(points):
+        return results
+
+    def binds(tqc):
+        # Bind by name: a cached transpiled circuit holds Parameter objects
+        # from the request that first built it
+        column = {name: points[:, j] for j, name in enumerate(names)}
+        return {p: column[p.name].tolist() for p in tqc.parameters}
+
+    if "counts" in outputs:
+        exec_backend, backend_type = get_execution_backend(backend_mode, qc.num_qubits)
+        if backend_type == "simulator":
+            tqc = cached_transpile(qc, exec_backend)
+            result = exec_backend.run(
+                tqc, shots=shots, seed_simulator=SIMULATOR_SEED, parameter_binds=[binds(tqc)]
+            ).result()
+            get_counts = lambda idx: CountsArray.from_aer(result, idx, tqc.num_clbits)
+        else:
+            tqc = cached_transpile(qc, exec_backend, optimization_level=1)
+            # One pub; its values array has a row per point, columns in
+            # tqc.parameters order
+            bound = binds(tqc)
+            values = np.column_stack([bound[p] for p in tqc.parameters])
+            pub_result = get_sampler(exec_backend).run([(tqc, values)], shots=shots).result()[0]
+            bitarray = next(iter(pub_result.data.values()))
+            get_counts = lambda idx: _bitarray_counts(bitarray, idx)
+        for i in range(len(points)):
+            results[i]["counts"] = get_counts(i).to_dict()
+
+    if "statevector" in outputs or "expectations" in outputs:
+        # get_simulator imports qiskit_aer, which adds save_statevector
+        sim = get_simulator("statevector")
+        qc_sv = strip_measurements(qc)
+        qc_sv.save_statevector()
+        tqc = cached_transpile(qc_sv, sim)
+        result = sim.run(tqc, parameter_binds=[binds(tqc)]).result()
+        for i in range(len(points)):
+            state = np.asarray(result.data(i)["statevector"])
+            if "statevector" in outputs:
+                results[i]["statevector"] = vector_to_json(state)
+            if "expectations" in outputs:
+                vectors = bloch_vectors_from_rhos(reduced_density_matrices(state))
+                results[i]["expectations"] = {
+                    f"qubit_{q}": vec.tolist() for q, vec in enumerate(vectors)
+                }
+
+    return results
+
+
+def get_statevector(qc, key=None):
+    """Pre-measurement statevector of qc, cached under ``key`` when given."""
+    if key is not None:
+        cached = RESULT_CACHE.get("statevector", key)
+        if cached is not None:
+            return cached
 
-def get_statevector(qc):
     qc_nom = qc.remove_final_measurements(inplace=False)
-    return Statevector.from_instruction(qc_nom)
+    state = Statevector.from_instruction(qc_nom)
+
+    if key is not None:
+        RESULT_CACHE.put("statevector", key, state)
+    return state
+
+
+def prefix_statevector(num_qubits, initial_states, gates):
+    """
+    Pre-measurement statevector of a gate list, resumed from the longest
+    cached gate prefix (prefix_cache) so editing the tail of a long circuit
+    only re-applies the gates after the edit. Checkpoints along the way.
+
+    Gates run on the NumPy engine (statevector_engine); a segment it does
+    not support goes through Qiskit instead.
+    """
+    keys = prefix_keys(num_qubits, initial_states, gates)
+    start, state = PREFIX_CACHE.longest_prefix(keys)
+    if state is None:
+        try:
+            state = Statevector(statevector_engine.initial_state(num_qubits, initial_states))
+        except statevector_engine.UnsupportedGate:
+            # Let Qiskit raise its usual error for bad initial states
+            return get_statevector(build_circuit(num_qubits, initial_states, gates))
+
+    done = start
+    for stop in checkpoint_positions(len(gates)):
+        if stop <= start:
+            continue
+        try:
+            # Cached states are shared, so work on a copy
+            state = Statevector(
+                statevector_engine.apply_gates(state.data.copy(), num_qubits, gates[done:stop])
+            )
+        except statevector_engine.UnsupportedGate:
+            segment = QuantumCircuit(num_qubits)
+            append_gates(segment, gates[done:stop])
+            state = state.evolve(segment)
+        PREFIX_CACHE.put(keys[stop], state)
+        done = stop
+
+    PREFIX_CACHE.record(start, len(gates) - start)
+    return state
+
+
+def payload_statevector(num_qubits, initial_states, gates, key=None):
+    """prefix_statevector, also cached whole under ``key`` (circuit_key)."""
+    if key is not None:
+        cached = RESULT_CACHE.get("statevector", key)
+        if cached is not None:
+            return cached
+
+    state = prefix_statevector(num_qubits, initial_states, gates)
+    if key is not None:
+        RESULT_CACHE.put("statevector", key, state)
+    return state
 
 
 def complex_to_list(c):
     return [float(c.real), float(c.imag)]
 
 
+def _complex_pairs(arr):
+    """[..., [re, im]] nested lists, built by NumPy rather than per element."""
+    arr = np.asarray(arr)
+    return np.stack([arr.real, arr.imag], axis=-1).tolist()
+
+
 def vector_to_json(vec):
-    return [complex_to_list(c) for c in vec]
+    return _complex_pairs(vec)
 
 
 def matrix_to_json(mat):
-    return [[complex_to_list(c) for c in row] for row in mat]
+    return _complex_pairs(mat)
 
 
-def get_quantum_outputs(qc):
+def reduced_density_matrices(state) -> np.ndarray:
     """
-    Returns:
-    - statevector
-    - full density matrix
-    - reduced density matrix for each qubit
+    Single-qubit reduced density matrices of a pure state, shape (n, 2, 2).
+
+    Works directly on the amplitudes: viewing |ψ⟩ as (high, q, low) axes
+    and contracting high/low gives ρ_q without ever forming the 2^n × 2^n
+    density matrix, so memory stays linear in the statevector.
     """
+    psi = np.asarray(getattr(state, "data", state))
+    n = int(np.log2(psi.size))
 
-    # Remove measurements
-    qc_nom = qc.remove_final_measurements(inplace=False)
+    rhos = np.empty((n, 2, 2), dtype=complex)
+    for q in range(n):
+        # Little-endian: qubit q selects bit q of the basis index (a view, no copy)
+        t = psi.reshape(2 ** (n - q - 1), 2, 2 ** q)
+        rhos[q] = np.einsum("aib,ajb->ij", t, t.conj())
+    return rhos
 
-    # 1️⃣ Statevector
-    statevector = Statevector.from_instruction(qc_nom)
 
-    # 2️⃣ Density Matrix
-    density_matrix = DensityMatrix(statevector)
+def mps_reduced_density_matrices(qc: QuantumCircuit) -> np.ndarray:
+    """
+    Single-qubit reduced density matrices, shape (n, 2, 2), from Aer's
+    matrix_product_state method: memory follows entanglement, not 2^n.
+    """
+    # get_simulator imports qiskit_aer, which adds save_density_matrix
+    sim = get_simulator("mps")
+    qc_mps = strip_measurements(qc)
+    for q in range(qc_mps.num_qubits):
+        qc_mps.save_density_matrix([q], label=f"rho_{q}")
+    data = sim.run(cached_transpile(qc_mps, sim)).result().data(0)
+    return np.stack([np.asarray(data[f"rho_{q}"]) for q in range(qc_mps.num_qubits)])
+
+
+def bloch_vectors_from_rhos(rhos: np.ndarray) -> np.ndarray:
+    """Bloch vectors (x, y, z) for a stack of 2x2 density matrices, shape (n, 3)."""
+    rho01 = rhos[:, 0, 1]
+    return np.stack(
+        [
+            2 * np.real(rho01),
+            -2 * np.imag(rho01),
+            np.real(rhos[:, 0, 0] - rhos[:, 1, 1]),
+        ],
+        axis=1,
+    )
+
+
+def density_matrix_block(state, rows: slice, cols: slice) -> np.ndarray:
+    """ρ[rows, cols] of a pure state, computed as an outer product of slices."""
+    psi = np.asarray(getattr(state, "data", state))
+    return np.outer(psi[rows], psi[cols].conj())
+
+
+def sparse_amplitudes(state, threshold=None, top_k=None, cursor=0, limit=None):
+    """
+    (indices, amplitudes, next_cursor) picked from a statevector:
+    - threshold: only basis states with |amplitude| >= threshold
+    - top_k: the top_k most probable of those, most probable first
+    - otherwise index order from basis state ``cursor``, at most ``limit``
+      entries; next_cursor resumes after them (None on the last page)
+    """
+    psi = np.asarray(getattr(state, "data", state))
+    candidates = None
+    if threshold is not None:
+        candidates = np.flatnonzero(np.abs(psi[cursor:]) >= threshold) + cursor
+
+    if top_k is not None:
+        probs = np.abs(psi if candidates is None else psi[candidates]) ** 2
+        k = min(top_k, len(probs))
+        picked = np.argpartition(probs, len(probs) - k)[len(probs) - k:]
+        picked = picked[np.argsort(-probs[picked], kind="stable")]
+        indices = picked if candidates is None else candidates[picked]
+        return indices, psi[indices], None
+
+    if candidates is None:
+        stop = len(psi) if limit is None else min(cursor + limit, len(psi))
+        indices = np.arange(cursor, stop)
+        more = stop < len(psi)
+    else:
+        more = limit is not None and len(candidates) > limit
+        indices = candidates[:limit]
+    next_cursor = int(indices[-1]) + 1 if more and len(indices) else None
+    return indices, psi[indices], next_cursor
 
-    # 3️⃣ Reduced Density Matrices
-    reduced_density_matrices = {}
 
-    n = qc.num_qubits
-    for q in range(n):
-        traced_out = [i for i in range(n) if i != q]
-        rdm = partial_trace(density_matrix, traced_out)
-        reduced_density_matrices[f"qubit_{q}"] = matrix_to_json(rdm.data)
-
-    return {
-        "statevector": vector_to_json(statevector.data),
-        "density_matrix": matrix_to_json(density_matrix.data),
-        "reduced_density_matrices": reduced_density_matrices,
+def get_quantum_arrays(qc, statevector=None, density_block=None):
+    """
+    NumPy arrays behind get_quantum_outputs:
+    - statevector, shape (2^n,)
+    - reduced_density_matrices, shape (n, 2, 2)
+    - density_matrix, only if ``density_block`` = (rows, cols) slices is given
+    """
+    if statevector is None:
+        statevector = get_statevector(qc)
+
+    arrays = {
+        "statevector": np.asarray(statevector.data),
+        "reduced_density_matrices": reduced_density_matrices(statevector),
     }
 
+    # Opt-in, grows as 4^n
+    if density_block is not None:
+        rows, cols = density_block
+        arrays["density_matrix"] = density_matrix_block(statevector, rows, cols)
 
-def get_all_qubits_bloch_vectors(qc: QuantumCircuit):
-    """
-    Computes Bloch vectors for ALL qubits using partial trace.
-    This is the core function that completes the problem statement.
-    """
+    return arrays
 
-    # Remove measurements (Bloch/state is pre-measurement)
-    qc_nom = qc.remove_final_measurements(inplace=False)
 
-    # Global pure state → density matrix
-    state = Statevector.from_instruction(qc_nom)
-    rho = DensityMatrix(state)
+def get_quantum_outputs(qc, statevector=None, density_block=None):
+    """
+    Returns:
+    - statevector
+    - reduced density matrix for each qubit
+    - density matrix, only if ``density_block`` = (rows, cols) slices is given
 
-    n = qc.num_qubits
-    bloch_vectors = {}
+    Pass an already simulated ``statevector`` to skip re-simulating qc.
+    """
+    arrays = get_quantum_arrays(qc, statevector, density_block)
+
+    outputs = {
+        "statevector": vector_to_json(arrays["statevector"]),
+        "reduced_density_matrices": {
+            f"qubit_{q}": matrix_to_json(rdm)
+            for q, rdm in enumerate(arrays["reduced_density_matrices"])
+        },
+    }
+    if "density_matrix" in arrays:
+        outputs["density_matrix"] = matrix_to_json(arrays["density_matrix"])
 
-    for q in range(n):
-        # Trace out all qubits except q
-        traced_out = [i for i in range(n) if i != q]
-        rdm = partial_trace(rho, traced_out)
+    return outputs
 
-        # Extract Bloch components from 2x2 density matrix
-        rho_q = rdm.data
 
-        x = 2 * np.real(rho_q[0, 1])
-        y = -2 * np.imag(rho_q[0, 1])
-        z = np.real(rho_q[0, 0] - rho_q[1, 1])
+def get_all_qubits_bloch_vectors(qc: QuantumCircuit, state=None, rhos=None):
+    """
+    Computes Bloch vectors for ALL qubits from their reduced states.
+    This is the core function that completes the problem statement.
+    Pass an already simulated ``state``, or the reduced density matrices
+    ``rhos`` themselves, to skip re-simulating qc.
+    """
 
-        bloch_vectors[f"qubit_{q}"] = [x, y, z]
+    if rhos is None:
+        # Global pure state (pre-measurement)
+        if state is None:
+            state = get_statevector(qc)
+        rhos = reduced_density_matrices(state)
 
-    return bloch_vectors
+    vectors = bloch_vectors_from_rhos(rhos)
+    return {f"qubit_{q}": vec.tolist() for q, vec in enumerate(vectors)}
 
 
-def reconstruct_single_qubit_rho(qc: QuantumCircuit, target: int, shots=1024):
-    if HAS_QISKIT_EXPERIMENTS:
+def reconstruct_single_qubit_rho(
+    qc: QuantumCircuit, target: int, shots=1024, backend_mode="simulator", dense=True
+):
+    # qiskit-experiments runs on Aer only and builds a dense target
+    # Statevector, so hardware, MPS and circuits too big for dense simulation
+    # (dense=False) go through the manual path
+    if HAS_QISKIT_EXPERIMENTS and dense and backend_mode not in ("hardware", "mps"):
         try:
+            from qiskit_experiments.library import StateTomography
+
             tomo = StateTomography(qc, [target])
-            exp_data = tomo.run(AerSimulator(), shots=shots).block_f_results()
+            exp_data = tomo.run(
+                get_simulator(backend_mode), shots=shots, seed_simulator=SIMULATOR_SEED
+            ).block_f_results()
 
             rho_np = None
             # Try pattern 1: analysis_results("state")
@@ -478,10 +592,10 @@ def reconstruct_single_qubit_rho(qc: QuantumCircuit, target: int, shots=1024):
 
         except Exception:
             # fallback to manual
-            return reconstruct_single_qubit_rho_manual(qc, target, shots)
+            return reconstruct_single_qubit_rho_manual(qc, target, shots, backend_mode)
     else:
-        # no experiments installed → manual
-        return reconstruct_single_qubit_rho_manual(qc, target, shots)
+        # no experiments installed (or hardware / MPS) → manual
+        return reconstruct_single_qubit_rho_manual(qc, target, shots, backend_mode)
 
 
 def _make_meas_circuit_variant(
@@ -506,23 +620,6 @@ def _expectation_from_probs(p0: float, p1: float) -> float:
     return float(p0 - p1)
 
 
-def _counts_bit_for_qubit(
-    counts: Dict[str, int], n_qubits: int, target: int
-) -> Tuple[float, float]:
-    """Compute probabilities P(0), P(1) for target qubit given counts dict."""
-    total, c0 = 0, 0
-    for bitstr, cnt in counts.items():
-        total += cnt
-        rev = bitstr[::-1]  # reverse bitstring so index matches qubit
-        if rev[target] == "0":
-            c0 += cnt
-    if total == 0:
-        return 0.0, 0.0
-    p0 = c0 / total
-    p1 = 1.0 - p0
-    return p0, p1
-
-
 def _reconstruct_rho_from_xyz(x: float, y: float, z: float) -> np.ndarray:
     """Reconstruct density matrix rho = 1/2 (I + xX + yY + zZ)."""
     rho = 0.5 * np.array([[1 + z, x - 1j * y], [x + 1j * y, 1 - z]], dtype=complex)
@@ -536,14 +633,14 @@ def reconstruct_single_qubit_rho_manual(
     base_qc: QuantumCircuit,
     target: int,
     shots: int = 1024,
-    backend_mode: str = "hardware",
+    backend_mode: str = "simulator",
 ):
     """Reconstruct reduced density matrix for a single qubit."""
     n = base_qc.num_qubits
     if not (0 <= target < n):
         raise ValueError("Target qubit out of range.")
 
-    exec_backend, backend_type = get_execution_backend(backend_mode)
+    exec_backend, backend_type = get_execution_backend(backend_mode, n)
     circuits, bases = [], []
 
     for basis in ("Z", "X", "Y"):
@@ -551,22 +648,63 @@ def reconstruct_single_qubit_rho_manual(
         bases.append(basis)
 
     if backend_type == "simulator":
-        tcirc = transpile(circuits, exec_backend)
-        result = exec_backend.run(tcirc, shots=shots).result()
-        get_counts = result.get_counts
+        tcirc = cached_transpile(circuits, exec_backend)
+        result = exec_backend.run(tcirc, shots=shots, seed_simulator=SIMULATOR_SEED).result()
+        get_counts = lambda idx: CountsArray.from_aer(result, idx, tcirc[idx].num_clbits)
     else:
-        tcirc = transpile(circuits, exec_backend, optimization_level=1)
-        sampler = Sampler(mode=exec_backend)
+        tcirc = cached_transpile(circuits, exec_backend, optimization_level=1)
+        sampler = get_sampler(exec_backend)
         job = sampler.run(tcirc, shots=shots)
         presult = job.result()
-        get_counts = lambda idx: presult[idx].data.meas.get_counts()
+        # Classical register name depends on the circuit ("c" here), take the only one
+        get_counts = lambda idx: _bitarray_counts(next(iter(presult[idx].data.values())))
 
 
     exps = {}
     for idx, basis in enumerate(bases):
-        counts = get_counts(idx)
-        p0, p1 = _counts_bit_for_qubit(counts, n, target)
-        exps[basis] = _expectation_from_probs(p0, p1)
+        p0, p1 = get_counts(idx).qubit_probabilities([target])
+        exps[basis] = _expectation_from_probs(p0[0], p1[0])
 
     x, y, z = exps["X"], exps["Y"], exps["Z"]
     return [x, y, z]
+
+
+def _all_qubit_basis_circuit(base_qc: QuantumCircuit, basis: str) -> QuantumCircuit:
+    """base_qc with every qubit rotated so measuring Z measures ``basis``."""
+    qc = strip_measurements(base_qc)
+    if qc.num_clbits < qc.num_qubits:
+        # remove_final_measurements drops the now-idle classical register
+        qc.add_register(ClassicalRegister(qc.num_qubits - qc.num_clbits))
+    qubits = range(qc.num_qubits)
+    if basis == "X":
+        qc.h(qubits)
+    elif basis == "Y":
+        qc.sdg(qubits)
+        qc.h(qubits)
+    elif basis != "Z":
+        raise ValueError("basis must be 'X','Y' or 'Z'")
+    return qc
+
+
+def reconstruct_all_qubits_bloch(
+    base_qc: QuantumCircuit,
+    shots: int = 1024,
+    backend_mode: str = "simulator",
+    stderr: bool = False,
+):
+    """
+    Measured Bloch vector of every qubit from three settings (all qubits in
+    X, all in Y, all in Z) run as one job, instead of three circuits per
+    qubit. Returns (vectors, errors): arrays of shape (n, 3), errors being
+    the standard error sqrt((1 - <P>^2) / shots) or None.
+    """
+    n = base_qc.num_qubits
+    circuits = [_all_qubit_basis_circuit(base_qc, basis) for basis in ("X", "Y", "Z")]
+    counts = simulate_counts_batch(circuits, shots, backend_mode)
+    for c in counts:
+        if isinstance(c, Exception):
+            raise c
+
+    vectors = np.column_stack([c.z_expectations(range(n)) for c in counts])
+    errors = np.sqrt(np.clip(1.0 - vectors**2, 0.0, None) / shots) if stderr else None
+    return vectors, errors
@@ -0,0 +1,121 @@
+import numpy as np
+
+# Outcomes wider than this are kept as Python ints (object arrays)
+_MAX_UINT_BITS = 64
+
+
+def _outcome_dtype(num_bits: int):
+    return np.uint64 if num_bits <= _MAX_UINT_BITS else object
+
+
+class CountsArray:
+    """
+    Measurement counts as integer outcomes with frequencies: bit q of
+    outcomes[i] is classical bit q (qubit q for build_circuit circuits),
+    so the bitstring "b_{n-1}...b_0" Qiskit prints is outcome int(b, 2).
+    Marginals and expectations are bitwise array operations; to_dict()
+    gives the usual bitstring dict for API responses.
+    """
+
+    __slots__ = ("outcomes", "freqs", "num_bits")
+
+    def __init__(self, outcomes, freqs, num_bits: int):
+        self.num_bits = int(num_bits)
+        self.outcomes = np.asarray(outcomes, dtype=_outcome_dtype(self.num_bits))
+        self.freqs = np.asarray(freqs, dtype=np.int64)
+
+    # ---------- CONSTRUCTION ----------
+
+    @classmethod
+    def from_dict(cls, counts: dict, num_bits=None):
+        """From a bitstring dict (registers may be space separated)."""
+        keys = [k.replace(" ", "") for k in counts]
+        if num_bits is None:
+            num_bits = max((len(k) for k in keys), default=0)
+        return cls(
+            [int(k, 2) for k in keys] if keys else [], list(counts.values()), num_bits
+        )
+
+    @classmethod
+    def from_int_counts(cls, counts: dict, num_bits: int):
+        """From {outcome int: count}, e.g. BitArray.get_int_counts()."""
+        return cls(list(counts), list(counts.values()), num_bits)
+
+    @classmethod
+    def from_aer(cls, result, idx: int, num_bits: int):
+        """Experiment idx of an Aer result; its raw counts are hex keyed."""
+        raw = result.data(idx)["counts"]
+        return cls([int(k, 16) for k in raw], list(raw.values()), num_bits)
+
+    @classmethod
+    def from_draws(cls, draws, num_bits: int):
+        """From a dense array of shots per outcome (a multinomial draw)."""
+        outcomes = np.flatnonzero(draws)
+        return cls(outcomes, np.asarray(draws)[outcomes], num_bits)
+
+    # ---------- BOUNDARY ----------
+
+    def to_dict(self) -> dict:
+        width = self.num_bits
+        return {
+            format(int(o), f"0{width}b"): int(f)
+            for o, f in zip(self.outcomes.tolist(), self.freqs.tolist())
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return self.outcomes.nbytes + self.freqs.nbytes
+
+    @property
+    def shots(self) -> int:
+        return int(self.freqs.sum())
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    # ---------- MARGINALS ----------
+
+    def bits(self, qubits=None) -> np.ndarray:
+        """0/1 matrix, one row per outcome, one column per bit in ``qubits``."""
+        qubits = range(self.num_bits) if qubits is None else qubits
+        if self.outcomes.dtype == object:
+            shifts = np.array([int(q) for q in qubits], dtype=object)
+            return ((self.outcomes[:, None] >> shifts) & 1).astype(np.uint8)
+        shifts = np.asarray(qubits, dtype=np.uint64)
+        return ((self.outcomes[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+    def marginal(self, qubits) -> "CountsArray":
+        """Counts over ``qubits`` only; bit j of the result is qubits[j]."""
+        qubits = list(qubits)
+        bits = self.bits(qubits).astype(_outcome_dtype(len(qubits)))
+        weights = np.array([1 << j for j in range(len(qubits))], dtype=bits.dtype)
+        packed = (bits * weights).sum(axis=1) if qubits else np.zeros(len(self), bits.dtype)
+        outcomes, inverse = np.unique(packed, return_inverse=True)
+        freqs = np.bincount(inverse.reshape(-1), weights=self.freqs, minlength=len(outcomes))
+        return CountsArray(outcomes, freqs.astype(np.int64), len(qubits))
+
+    def probabilities_one(self, qubits=None) -> np.ndarray:
+        """P(bit = 1) for every bit in ``qubits`` (all bits by default)."""
+        total = self.shots
+        if total == 0:
+            return np.zeros(len(range(self.num_bits) if qubits is None else qubits))
+        return self.freqs.astype(np.float64) @ self.bits(qubits) / total
+
+    def qubit_probabilities(self, qubits=None):
+        """(P(0), P(1)) arrays for every bit in ``qubits``."""
+        p1 = self.probabilities_one(qubits)
+        p0 = np.where(self.shots == 0, 0.0, 1.0 - p1)
+        return p0, p1
+
+    def z_expectations(self, qubits=None) -> np.ndarray:
+        """<Z> = P(0) - P(1) of every bit in ``qubits``."""
+        p0, p1 = self.qubit_probabilities(qubits)
+        return p0 - p1
+
+    def parity_expectation(self, qubits) -> float:
+        """<Z_q1 Z_q2 ...>: the +1/-1 parity of the bits in ``qubits``, averaged."""
+        total = self.shots
+        if total == 0:
+            return 0.0
+        parity = self.bits(qubits).sum(axis=1) & 1
+        return float(self.freqs @ (1 - 2 * parity.astype(np.int64)) / total)
@@ -0,0 +1,299 @@
+"""
+The gates a payload may use, in one table shared by every builder and
+engine (circuit_builder1, Qiskit1, statevector_engine). Names are looked up
+case-insensitively, aliases included ("Rx", "RX"; "CX", "CNOT").
+
+compile_gates() validates a payload gate list in one pass and flattens it
+into Ops: CUSTOM_CIRCUIT sub-gates are mapped onto the outer qubits, so a
+sub-circuit can hold anything a top-level gate list can. append_gates()
+builds the Ops into a QuantumCircuit; statevector_engine applies them to
+an array.
+"""
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter
+from qiskit.circuit.library import (
+    HGate,
+    PhaseGate,
+    RXGate,
+    RYGate,
+    RZGate,
+    SdgGate,
+    SGate,
+    TdgGate,
+    TGate,
+    UnitaryGate,
+    XGate,
+    YGate,
+    ZGate,
+)
+from qiskit.quantum_info.operators.predicates import is_unitary_matrix
+
+
+class InvalidGate(ValueError):
+    pass
+
+
+# ---------- MATRICES ----------
+
+_SQ2 = 1 / np.sqrt(2)
+
+
+def rx(theta):
+    c, s = np.cos(theta / 2), np.sin(theta / 2)
+    return np.array([[c, -1j * s], [-1j * s, c]], dtype=complex)
+
+
+def ry(theta):
+    c, s = np.cos(theta / 2), np.sin(theta / 2)
+    return np.array([[c, -s], [s, c]], dtype=complex)
+
+
+def rz(theta):
+    return np.array([[np.exp(-0.5j * theta), 0], [0, np.exp(0.5j * theta)]], dtype=complex)
+
+
+def phase(theta):
+    return np.array([[1, 0], [0, np.exp(1j * theta)]], dtype=complex)
+
+
+def decode_complex_matrix(mat):
+    return np.array([[complex(c.re, c.im) for c in row] for row in mat], dtype=complex)
+
+
+# ---------- REGISTRY ----------
+
+class GateSpec:
+    """
+    One named gate. ``build(qc, qubits, angle)`` appends it with the native
+    QuantumCircuit method; ``matrix`` is precomputed for fixed gates and
+    ``rotation(angle)`` gives it for angle gates. Controlled gates (CNOT,
+    CZ, CCNOT) name their 1-qubit ``base``; controls come first in qubits.
+    """
+
+    __slots__ = ("name", "num_qubits", "takes_angle", "build", "matrix", "rotation",
+                 "base", "num_controls", "qiskit_gate", "build_controlled")
+
+    def __init__(self, name, num_qubits, build, matrix=None, rotation=None,
+                 base=None, qiskit_gate=None, build_controlled=None):
+        self.name = name
+        self.num_qubits = num_qubits
+        self.takes_angle = rotation is not None
+        self.build = build
+        self.matrix = matrix
+        self.rotation = rotation
+        self.base = base
+        self.num_controls = num_qubits - 1 if base is not None else 0
+        self.qiskit_gate = qiskit_gate
+        self.build_controlled = build_controlled
+
+    def unitary(self, angle=None) -> np.ndarray:
+        return self.rotation(angle) if self.takes_angle else self.matrix
+
+    def append_controlled(self, qc: QuantumCircuit, angle, controls, target):
+        """This 1-qubit gate on target, controlled on every qubit in controls."""
+        if self.build_controlled is not None:
+            self.build_controlled(qc, angle, controls, target)
+            return
+        gate = self.qiskit_gate(angle) if self.takes_angle else self.qiskit_gate()
+        qc.append(gate.control(len(controls)), [*controls, target])
+
+
+def _fixed(name, method, matrix, qiskit_gate, build_controlled=None):
+    return GateSpec(
+        name, 1, lambda qc, q, a: method(qc, q[0]), matrix=matrix,
+        qiskit_gate=qiskit_gate, build_controlled=build_controlled,
+    )
+
+
+def _rotation(name, method, rotation, qiskit_gate, build_controlled):
+    return GateSpec(
+        name, 1, lambda qc, q, a: method(qc, a, q[0]), rotation=rotation,
+        qiskit_gate=qiskit_gate, build_controlled=build_controlled,
+    )
+
+
+_X = np.array([[0, 1], [1, 0]], dtype=complex)
+_Z = np.array([[1, 0], [0, -1]], dtype=complex)
+
+GATES = {
+    spec.name: spec
+    for spec in (
+        _fixed("X", QuantumCircuit.x, _X, XGate,
+               lambda qc, a, c, t: qc.mcx(c, t)),
+        _fixed("Y", QuantumCircuit.y, np.array([[0, -1j], [1j, 0]], dtype=complex), YGate),
+        _fixed("Z", QuantumCircuit.z, _Z, ZGate),
+        _fixed("H", QuantumCircuit.h, np.array([[_SQ2, _SQ2], [_SQ2, -_SQ2]], dtype=complex), HGate),
+        _fixed("S", QuantumCircuit.s, phase(np.pi / 2), SGate,
+               lambda qc, a, c, t: qc.mcp(np.pi / 2, c, t)),
+        _fixed("SDG", QuantumCircuit.sdg, phase(-np.pi / 2), SdgGate),
+        _fixed("T", QuantumCircuit.t, phase(np.pi / 4), TGate,
+               lambda qc, a, c, t: qc.mcp(np.pi / 4, c, t)),
+        _fixed("TDG", QuantumCircuit.tdg, phase(-np.pi / 4), TdgGate),
+        _rotation("RX", QuantumCircuit.rx, rx, RXGate, lambda qc, a, c, t: qc.mcrx(a, c, t)),
+        _rotation("RY", QuantumCircuit.ry, ry, RYGate, lambda qc, a, c, t: qc.mcry(a, c, t)),
+        _rotation("RZ", QuantumCircuit.rz, rz, RZGate, lambda qc, a, c, t: qc.mcrz(a, c, t)),
+        _rotation("PHASE", QuantumCircuit.p, phase, PhaseGate, lambda qc, a, c, t: qc.mcp(a, c, t)),
+        GateSpec("CNOT", 2, lambda qc, q, a: qc.cx(q[0], q[1]), base="X"),
+        GateSpec("CZ", 2, lambda qc, q, a: qc.cz(q[0], q[1]), base="Z"),
+        GateSpec("CCNOT", 3, lambda qc, q, a: qc.ccx(q[0], q[1], q[2]), base="X"),
+        GateSpec("SWAP", 2, lambda qc, q, a: qc.swap(q[0], q[1]),
+                 matrix=np.eye(4, dtype=complex)[[0, 2, 1, 3]]),
+    )
+}
+
+ALIASES = {"CX": "CNOT", "CCX": "CCNOT"}
+
+# Every accepted spelling, upper-cased, -> spec
+_LOOKUP = {**GATES, **{alias: GATES[name] for alias, name in ALIASES.items()}}
+
+CONTROLLED_NAMES = frozenset(name for name, spec in _LOOKUP.items() if spec.base is not None)
+
+
+def lookup(name: str):
+    """The GateSpec for a gate type in any case or alias, or None."""
+    return _LOOKUP.get(name.upper()) if isinstance(name, str) else None
+
+
+# ---------- COMPILATION ----------
+
+NAMED, CONTROLLED, MATRIX = "named", "controlled", "matrix"
+
+
+class Op:
+    """
+    One validated gate on absolute qubits. NAMED: ``spec`` on ``qubits``;
+    CONTROLLED: 1-qubit ``spec`` on qubits[-1], controlled on the rest;
+    MATRIX: ``matrix`` with qubits[0] as its least significant index bit.
+    """
+
+    __slots__ = ("kind", "spec", "qubits", "angle", "matrix", "label")
+
+    def __init__(self, kind, qubits, spec=None, angle=None, matrix=None, label=None):
+        self.kind = kind
+        self.qubits = qubits
+        self.spec = spec
+        self.angle = angle
+        self.matrix = matrix
+        self.label = label
+
+
+def gate_angle(gate, parameters=None):
+    """
+    gate.angle, or the qiskit Parameter named by gate.param when building a
+    parameterized circuit (``parameters`` collects name -> Parameter).
+    """
+    name = getattr(gate, "param", None)
+    if name is None or parameters is None:
+        return getattr(gate, "angle", None)
+    if name not in parameters:
+        parameters[name] = Parameter(name)
+    return parameters[name]
+
+
+def _qubits(gate, params, count, width, mapping):
+    """The first ``count`` params as qubits, checked, mapped to outer qubits."""
+    if len(params) < count:
+        raise InvalidGate(f"{gate.type} needs {count} qubit(s), got {len(params)}")
+    if count == 1:  # most gates: skip the list and set work
+        q = int(params[0])
+        if not 0 <= q < width:
+            raise InvalidGate(f"{gate.type} qubit out of range 0..{width - 1}: {q}")
+        return [q] if mapping is None else [mapping[q]]
+    local = [int(q) for q in params[:count]]
+    if local and (min(local) < 0 or max(local) >= width):
+        raise InvalidGate(f"{gate.type} qubit out of range 0..{width - 1}: {local}")
+    if len(set(local)) != count:
+        raise InvalidGate(f"{gate.type} repeats a qubit: {local}")
+    return local if mapping is None else [mapping[q] for q in local]
+
+
+def _checked_angle(gate, spec, parameters):
+    if not spec.takes_angle:
+        return None
+    angle = gate_angle(gate, parameters)
+    if angle is None:
+        raise InvalidGate(f"{gate.type} needs an angle")
+    return angle
+
+
+def _compile(gate, width, mapping, parameters, ops):
+    params = getattr(gate, "params", None) or []
+    spec = lookup(gate.type)
+    if spec is not None:
+        qubits = _qubits(gate, params, spec.num_qubits, width, mapping)
+        ops.append(Op(NAMED, qubits, spec, _checked_angle(gate, spec, parameters)))
+        return
+
+    custom = getattr(gate, "customType", None)
+    if gate.type.upper() != "CUSTOM":
+        raise InvalidGate(f"Unsupported gate type: {gate.type}")
+
+    if custom == "CUSTOM_MATRIX":
+        if not params or not getattr(gate, "matrix", None):
+            raise InvalidGate("CUSTOM_MATRIX needs qubits and a matrix")
+        qubits = _qubits(gate, params, len(params), width, mapping)
+        u = decode_complex_matrix(gate.matrix)
+        dim = 2 ** len(qubits)
+        if u.shape != (dim, dim) or not is_unitary_matrix(u):
+            raise InvalidGate(f"CUSTOM_MATRIX is not a {dim}x{dim} unitary")
+        ops.append(Op(MATRIX, qubits, matrix=u, label=getattr(gate, "name", None)))
+
+    elif custom == "CUSTOM_CONTROL":
+        sub_gates = getattr(gate, "subGates", None) or []
+        if len(sub_gates) != 1:
+            raise InvalidGate("CUSTOM_CONTROL must wrap exactly one subGate")
+        sg = sub_gates[0]
+        spec = lookup(sg.type)
+        if spec is None or spec.num_qubits != 1:
+            raise InvalidGate(f"Unsupported controlled gate: {sg.type}")
+        if len(params) < 2:
+            raise InvalidGate("CUSTOM_CONTROL needs control and target qubits")
+        qubits = _qubits(gate, params, len(params), width, mapping)
+        ops.append(Op(CONTROLLED, qubits, spec, _checked_angle(sg, spec, parameters)))
+
+    elif custom == "CUSTOM_CIRCUIT":
+        sub_gates = getattr(gate, "subGates", None) or []
+        local = [int(q) for sg in sub_gates for q in (getattr(sg, "params", None) or [])]
+        sub_width = max(local) + 1 if local else len(params)
+        if sub_width != len(params):
+            raise InvalidGate(
+                f"CUSTOM_CIRCUIT uses {sub_width} qubit(s) but is placed on {len(params)}"
+            )
+        sub_mapping = _qubits(gate, params, len(params), width, mapping)
+        for sg in sub_gates:
+            _compile(sg, sub_width, sub_mapping, parameters, ops)
+
+    else:
+        raise InvalidGate(f"Unsupported custom gate: {custom}")
+
+
+def compile_gates(num_qubits: int, gates, parameters=None) -> list:
+    """
+    Validate payload gates on num_qubits qubits and flatten them into Ops;
+    raises InvalidGate on the first bad gate. ``parameters`` is as for
+    gate_angle.
+    """
+    ops = []
+    for gate in gates:
+        _compile(gate, num_qubits, None, parameters, ops)
+    return ops
+
+
+# ---------- QISKIT ----------
+
+def append_ops(qc: QuantumCircuit, ops) -> QuantumCircuit:
+    for op in ops:
+        if op.kind == NAMED:
+            op.spec.build(qc, op.qubits, op.angle)
+        elif op.kind == CONTROLLED:
+            op.spec.append_controlled(qc, op.angle, op.qubits[:-1], op.qubits[-1])
+        else:
+            # Already checked unitary by compile_gates
+            qc.append(UnitaryGate(op.matrix, label=op.label, check_input=False), op.qubits)
+    return qc
+
+
+def append_gates(qc: QuantumCircuit, gates, parameters=None) -> QuantumCircuit:
+    """Append payload gates to qc (no initial state, no measurements)."""
+    return append_ops(qc, compile_gates(qc.num_qubits, gates, parameters))
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from result_cache import ResultCache
+
+IMAGE_CACHE_DIR = os.getenv(
+    "QSVM_IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "qsvm_image_cache")
+)
+IMAGE_CACHE_DISK_BYTES = int(os.getenv("QSVM_IMAGE_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+IMAGE_CACHE_MEMORY_BYTES = int(os.getenv("QSVM_IMAGE_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+
+
+class ImageCache:
+    """
+    Rendered PNGs keyed by (circuit hash, plot kind, render options, variant).
+    An in-memory LRU sits in front of an on-disk store, which is shared by
+    every worker on the host and survives restarts. The disk is trimmed
+    least-recently-used first once it grows past ``max_disk_bytes``.
+    """
+
+    def __init__(self, directory=IMAGE_CACHE_DIR, max_disk_bytes=IMAGE_CACHE_DISK_BYTES,
+                 max_memory_bytes=IMAGE_CACHE_MEMORY_BYTES):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = ResultCache(max_memory_bytes)
+        self._lock = threading.Lock()
+        self._index = None  # path -> (size, mtime), loaded lazily
+        self._disk_bytes = 0
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(circuit_key: str, kind: str, options=None, variant=None) -> str:
+        blob = json.dumps([circuit_key, kind, options, variant], sort_keys=True, default=repr)
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".png")
+
+    def _load_index(self):
+        # Caller holds self._lock
+        if self._index is not None:
+            return
+        self._index, self._disk_bytes = {}, 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".png"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    self._index[path] = (st.st_size, st.st_mtime)
+                    self._disk_bytes += st.st_size
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def get(self, key: str):
+        png = self._memory.get("image", key)
+        if png is not None:
+            self._count("memory_hits")
+            return png
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                png = f.read()
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            self._count("misses")
+            return None
+
+        self._count("disk_hits")
+        self._memory.put("image", key, png)
+        return png
+
+    def put(self, key: str, png: bytes):
+        self._memory.put("image", key, png)
+        if len(png) > self.max_disk_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(png)
+            os.replace(tmp, path)
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return
+
+        with self._lock:
+            self._load_index()
+            old = self._index.get(path)
+            if old is not None:
+                self._disk_bytes -= old[0]
+            self._index[path] = (len(png), mtime)
+            self._disk_bytes += len(png)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Caller holds self._lock. Other workers share the directory, so
+        # rescan it before deciding what to delete.
+        self._index = None
+        self._load_index()
+        for path, (size, _) in sorted(self._index.items(), key=lambda kv: kv[1][1]):
+            if self._disk_bytes <= self.max_disk_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            del self._index[path]
+            self._disk_bytes -= size
+
+    def stats(self):
+        with self._lock:
+            self._load_index()
+            counts = dict(self._counts)
+            disk_bytes = self._disk_bytes
+        lookups = sum(counts.values())
+        hits = counts["memory_hits"] + counts["disk_hits"]
+        return {
+            **counts,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_bytes": self._memory.stats()["bytes"],
+            "disk_bytes": disk_bytes,
+            "max_disk_bytes": self.max_disk_bytes,
+        }
+
+
+# Process-wide image cache used by app.py
+IMAGE_CACHE = ImageCache()
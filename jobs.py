@@ -0,0 +1,322 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import APIRouter, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+JOBS_DIR = os.getenv("QSVM_JOBS_DIR", os.path.join(tempfile.gettempdir(), "qsvm_jobs"))
+# Jobs executing at once; hardware jobs mostly sit waiting on IBM's queue
+JOB_WORKERS = int(os.getenv("QSVM_JOB_WORKERS", "4"))
+# Unfinished jobs allowed before submissions are refused
+JOB_QUEUE = int(os.getenv("QSVM_JOB_QUEUE", "100"))
+# Finished jobs are deleted this long after they finish
+JOB_TTL_SECONDS = float(os.getenv("QSVM_JOB_TTL_SECONDS", str(24 * 3600)))
+# Seconds between SSE keep-alive comments while a job is pending
+SSE_KEEPALIVE_SECONDS = 15
+# Seconds between reads of a record owned by another worker process
+JOB_POLL_SECONDS = float(os.getenv("QSVM_JOB_POLL_SECONDS", "0.5"))
+
+FINISHED = ("done", "failed")
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class JobStoreUnavailable(RuntimeError):
+    pass
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
+
+
+class JobManager:
+    """
+    Runs registered job kinds on a background thread pool. Each job is a
+    JSON record (status, timestamps, payload, result or error) kept in
+    memory and written to ``directory``, so status survives restarts and
+    is readable from every worker process on the host.
+    """
+
+    def __init__(self, name: str, directory=JOBS_DIR, workers=JOB_WORKERS,
+                 queue_size=JOB_QUEUE, ttl=JOB_TTL_SECONDS):
+        self.directory = os.path.join(directory, name)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.ttl = ttl
+        self._kinds = {}
+        self._jobs = {}      # id -> record, for jobs owned by this process
+        self._waiters = {}   # id -> callbacks fired on every status change
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def register(self, kind: str, fn):
+        """fn(payload: dict) -> JSON-ready result."""
+        self._kinds[kind] = fn
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="qsvm-job"
+                )
+            return self._executor
+
+    # ---------- PERSISTENCE ----------
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id + ".json")
+
+    def _save(self, record: dict) -> bool:
+        """Write the record to disk; False if the directory is unusable."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write then rename so readers never see a partial record
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(record, f)
+            os.replace(tmp, self._path(record["id"]))
+        except OSError:
+            return False
+        return True
+
+    def _load(self, job_id: str):
+        # Ids come from URLs; only uuid hex may ever become a file name
+        if len(job_id) != 32 or any(c not in "0123456789abcdef" for c in job_id):
+            return None
+        try:
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # ---------- LIFECYCLE ----------
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            record = self._jobs[job_id]
+            record.update(fields)
+            snapshot = dict(record)
+            waiters = self._waiters.pop(job_id, [])
+        saved = self._save(snapshot)
+        for notify in waiters:
+            notify()
+        if snapshot["status"] in FINISHED and saved:
+            with self._lock:
+                # Finished records are served from disk from now on; one
+                # that could not be written stays in memory instead
+                self._jobs.pop(job_id, None)
+
+    def _run(self, job_id: str):
+        with self._lock:
+            record = self._jobs[job_id]
+            fn, payload = self._kinds[record["kind"]], record["payload"]
+        self._update(job_id, status="running", started=time.time())
+        try:
+            result = jsonable_encoder(fn(payload))
+        except HTTPException as e:
+            self._update(job_id, status="failed", finished=time.time(),
+                         error={"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            self._update(job_id, status="failed", finished=time.time(),
+                         error={"status_code": 500, "detail": str(e)})
+        else:
+            self._update(job_id, status="done", finished=time.time(), result=result)
+
+    def _enqueue(self, record: dict) -> bool:
+        """Persist and queue a record; False (nothing queued) if it cannot be saved."""
+        if not self._save(record):
+            return False
+        with self._lock:
+            self._jobs[record["id"]] = record
+        self._get_executor().submit(self._run, record["id"])
+        return True
+
+    def submit(self, kind: str, payload: dict) -> dict:
+        if kind not in self._kinds:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with self._lock:
+            unfinished = sum(r["status"] not in FINISHED for r in self._jobs.values())
+            if unfinished >= self.queue_size:
+                raise JobQueueFull(f"Job queue full ({self.queue_size} unfinished)")
+        self.prune()
+        record = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "pid": os.getpid(),
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+            "payload": jsonable_encoder(payload),
+            "result": None,
+            "error": None,
+        }
+        job = self.public(record)
+        # Never hand out an id whose record could not be kept
+        if not self._enqueue(record):
+            raise JobStoreUnavailable(f"Job directory {self.directory} is not writable")
+        return job
+
+    def recover(self):
+        """Re-queue unfinished jobs left behind by a process that has exited."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            record = self._load(name[: -len(".json")])
+            if record is None or record["status"] in FINISHED:
+                continue
+            if record["pid"] != os.getpid() and _pid_alive(record["pid"]):
+                continue  # still owned by another worker
+            if record["kind"] not in self._kinds:
+                continue
+            record.update(status="queued", pid=os.getpid(), started=None)
+            self._enqueue(record)
+
+    def prune(self):
+        """Delete finished job records older than the TTL."""
+        if not os.path.isdir(self.directory):
+            return
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith(".json") and os.stat(path).st_mtime < cutoff:
+                    record = self._load(name[: -len(".json")])
+                    if record is not None and record["status"] in FINISHED:
+                        os.remove(path)
+            except OSError:
+                pass
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- QUERIES ----------
+
+    @staticmethod
+    def public(record: dict) -> dict:
+        """Job record as returned to clients (without payload and pid)."""
+        return {k: v for k, v in record.items() if k not in ("payload", "pid")}
+
+    def get(self, job_id: str):
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is not None:
+                return dict(record)
+        return self._load(job_id)
+
+    async def wait_for_change(self, job_id: str, status: str, timeout: float) -> bool:
+        """Wait until the job leaves ``status``; False on timeout."""
+        loop = asyncio.get_running_loop()
+        changed = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: changed.done() or changed.set_result(None))
+
+        with self._lock:
+            record = self._jobs.get(job_id)
+            if record is not None:
+                if record["status"] != status:
+                    return True
+                self._waiters.setdefault(job_id, []).append(notify)
+        if record is None:
+            return await self._poll_for_change(job_id, status, timeout)
+        try:
+            await asyncio.wait_for(changed, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _poll_for_change(self, job_id: str, status: str, timeout: float) -> bool:
+        """wait_for_change for records this process does not own: re-read the file."""
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self._load(job_id)
+            if record is None or record["status"] != status:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(JOB_POLL_SECONDS, remaining))
+
+    def stats(self):
+        with self._lock:
+            statuses = [r["status"] for r in self._jobs.values()]
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+        }
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def jobs_router(manager: JobManager) -> APIRouter:
+    """GET /jobs/{id} and its server-sent-events stream, shared by both services."""
+    router = APIRouter()
+
+    def job_or_404(job_id: str):
+        record = manager.get(job_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+        return record
+
+    @router.get("/jobs/stats")
+    def job_stats():
+        return manager.stats()
+
+    @router.get("/jobs/{job_id}")
+    def job_status(job_id: str):
+        return manager.public(job_or_404(job_id))
+
+    @router.get("/jobs/{job_id}/events")
+    async def job_events(job_id: str):
+        """
+        One event per status change (queued, running, done/failed), each
+        carrying the job record; the stream ends once the job finishes.
+        """
+        record = job_or_404(job_id)
+
+        async def stream():
+            current = record
+            yield _sse(current["status"], manager.public(current))
+            while current["status"] not in FINISHED:
+                while not await manager.wait_for_change(
+                    job_id, current["status"], SSE_KEEPALIVE_SECONDS
+                ):
+                    yield ": keep-alive\n\n"
+                latest = manager.get(job_id)
+                if latest is None:
+                    return
+                # Only real status changes become events
+                if latest["status"] != current["status"]:
+                    current = latest
+                    yield _sse(current["status"], manager.public(current))
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return router
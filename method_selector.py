@@ -0,0 +1,82 @@
+import os
+
+from backends import get_simulator
+from gate_registry import CONTROLLED_NAMES
+
+# Memory dense statevector work may use before circuits go to MPS instead
+DENSE_MEMORY_BYTES = int(os.getenv("QSVM_DENSE_MEMORY_BYTES", str(2 * 1024**3)))
+# Dense simulation holds the state plus about one copy (checkpoint, result)
+DENSE_COPIES = 2
+AMPLITUDE_BYTES = 16  # complex128
+
+# Controlled gates have operator Schmidt rank 2 across any cut
+CONTROLLED_TYPES = CONTROLLED_NAMES
+
+
+class CircuitTooLarge(ValueError):
+    pass
+
+
+def dense_bytes(num_qubits: int) -> float:
+    return DENSE_COPIES * AMPLITUDE_BYTES * 2.0 ** num_qubits
+
+
+def _gate_qubits(gate):
+    return sorted({int(q) for q in (getattr(gate, "params", None) or [])})
+
+
+def _log2_rank(gate, left: int, right: int) -> int:
+    """log2 of how much ``gate`` can grow the bond across a cut it spans."""
+    g = gate.type.upper()
+    if g in CONTROLLED_TYPES or getattr(gate, "customType", None) == "CUSTOM_CONTROL":
+        return 1
+    # Any unitary on left|right qubits: operator Schmidt rank <= 4^min(left, right)
+    return 2 * min(left, right)
+
+
+def bond_dimensions_log2(num_qubits: int, gates) -> list:
+    """
+    Upper bound on log2 of the MPS bond dimension at each cut (between
+    qubit c and c+1). Aer keeps qubits in index order and swaps distant
+    qubits together, so a gate grows every cut between its outermost qubits.
+    """
+    n = num_qubits
+    growth = [0] * max(n - 1, 0)
+    for gate in gates:
+        qubits = _gate_qubits(gate)
+        if len(qubits) < 2:
+            continue
+        for c in range(qubits[0], qubits[-1]):
+            left = sum(q <= c for q in qubits)
+            growth[c] += _log2_rank(gate, left, len(qubits) - left)
+    return [min(growth[c], c + 1, n - c - 1) for c in range(n - 1)]
+
+
+def mps_bytes(num_qubits: int, gates) -> float:
+    """Upper bound on MPS memory: a 2 x chi_left x chi_right tensor per qubit."""
+    bonds = [0] + bond_dimensions_log2(num_qubits, gates) + [0]
+    return sum(
+        2 * AMPLITUDE_BYTES * 2.0 ** (bonds[q] + bonds[q + 1]) for q in range(num_qubits)
+    )
+
+
+def select_method(num_qubits: int, gates, budget: int = DENSE_MEMORY_BYTES) -> str:
+    """
+    "statevector" while dense simulation fits ``budget``, else
+    "matrix_product_state" if its bound fits; raises CircuitTooLarge otherwise.
+    """
+    if dense_bytes(num_qubits) <= budget:
+        return "statevector"
+    mps_max_qubits = get_simulator("mps").num_qubits
+    if num_qubits > mps_max_qubits:
+        raise CircuitTooLarge(
+            f"{num_qubits} qubits exceed the matrix product state simulator's "
+            f"limit of {mps_max_qubits}"
+        )
+    if mps_bytes(num_qubits, gates) <= budget:
+        return "matrix_product_state"
+    raise CircuitTooLarge(
+        f"{num_qubits} qubits need ~{dense_bytes(num_qubits) / 2**20:.0f} MiB as a "
+        f"statevector and the circuit is too entangled for a matrix product state "
+        f"within {budget / 2**20:.0f} MiB"
+    )
@@ -0,0 +1,248 @@
+import bisect
+import inspect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from fastapi.routing import APIRoute
+
+# "0" turns request timing off: no middleware, stages cost one global lookup
+METRICS_ENABLED = os.getenv("QSVM_METRICS", "1") != "0"
+
+# Histogram buckets in seconds (Prometheus "le" bounds)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Gate counts are bucketed so label values stay few
+GATE_BUCKETS = ((10, "0-9"), (100, "10-99"), (1000, "100-999"))
+
+
+def gate_bucket(num_gates) -> str:
+    if num_gates is None:
+        return ""
+    for bound, label in GATE_BUCKETS:
+        if num_gates < bound:
+            return label
+    return "1000+"
+
+
+# ---------- PER-REQUEST STAGES ----------
+
+class RequestTimings:
+    """Stage durations of one request, filled in by timed() while it runs."""
+
+    __slots__ = ("start", "stages", "num_qubits", "num_gates", "entered", "exited")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}  # name -> seconds, summed over repeats
+        self.num_qubits = None
+        self.num_gates = None
+        self.entered = None
+        self.exited = None
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_CURRENT: ContextVar = ContextVar("qsvm_request_timings", default=None)
+
+
+class _Stage:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def timed(stage: str):
+    """``with timed("build"):`` adds the block's duration to the current request."""
+    timings = _CURRENT.get() if METRICS_ENABLED else None
+    return _NO_STAGE if timings is None else _Stage(timings, stage)
+
+
+def annotate(num_qubits=None, num_gates=None):
+    """Circuit size labels for the current request's metrics."""
+    timings = _CURRENT.get() if METRICS_ENABLED else None
+    if timings is not None:
+        timings.num_qubits = num_qubits
+        timings.num_gates = num_gates
+
+
+# ---------- HISTOGRAMS ----------
+
+class Histogram:
+    """Thread-safe cumulative histogram per label tuple, in Prometheus text form."""
+
+    def __init__(self, name: str, help_text: str, labelnames, buckets=BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {values[-1]}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_LABELS = ("endpoint", "qubits", "gates")
+REQUEST_SECONDS = Histogram(
+    "qsvm_request_duration_seconds", "Request time until the response starts.", _LABELS
+)
+STAGE_SECONDS = Histogram(
+    "qsvm_stage_duration_seconds", "Time per request stage.", _LABELS + ("stage",)
+)
+
+
+def render_metrics(gauges) -> str:
+    """
+    Prometheus text: the histograms plus ``gauges``, an iterable of
+    (name, help, {labels dict as tuple of pairs: value}).
+    """
+    lines = REQUEST_SECONDS.render() + STAGE_SECONDS.render()
+    for name, help_text, samples in gauges:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        for labels, value in samples.items():
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {float(value)}" if labels else f"{name} {float(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- ASGI / ROUTING HOOKS ----------
+
+class TimingMiddleware:
+    """
+    Times each HTTP request: adds a Server-Timing header (stages recorded
+    with timed(), plus "parse" before the endpoint runs and "serialize"
+    after it returns) and feeds the histograms.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = _CURRENT.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                if timings.entered is not None:
+                    timings.add("parse", timings.entered - timings.start)
+                if timings.exited is not None:
+                    timings.add("serialize", now - timings.exited)
+                total = now - timings.start
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing(total).encode()))
+                message = {**message, "headers": headers}
+                _record(scope, timings, total)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _CURRENT.reset(token)
+
+
+def _record(scope, timings: RequestTimings, total: float):
+    route = scope.get("route")
+    endpoint = getattr(route, "path", None) or "unmatched"
+    labels = (
+        endpoint,
+        "" if timings.num_qubits is None else str(timings.num_qubits),
+        gate_bucket(timings.num_gates),
+    )
+    REQUEST_SECONDS.observe(labels, total)
+    for stage, seconds in timings.stages.items():
+        STAGE_SECONDS.observe(labels + (stage,), seconds)
+
+
+def _mark_endpoint(fn):
+    """Wrap an endpoint so the request records when it entered and left it."""
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def endpoint(*args, **kwargs):
+            timings = _CURRENT.get()
+            if timings is not None:
+                timings.entered = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                if timings is not None:
+                    timings.exited = time.perf_counter()
+    else:
+        @wraps(fn)
+        def endpoint(*args, **kwargs):
+            timings = _CURRENT.get()
+            if timings is not None:
+                timings.entered = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if timings is not None:
+                    timings.exited = time.perf_counter()
+    return endpoint
+
+
+class TimedRoute(APIRoute):
+    """APIRoute whose endpoint marks the parse/serialize boundaries."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _mark_endpoint(endpoint), **kwargs)
@@ -0,0 +1,70 @@
+import numpy as np
+
+# Basis states below this probability are left out of the q-sphere points
+QSPHERE_MIN_PROBABILITY = 1e-10
+
+
+def _amplitudes(state) -> np.ndarray:
+    return np.asarray(getattr(state, "data", state))
+
+
+def histogram_data(counts: dict):
+    """Bar labels and heights of plot_histogram (sorted by bitstring)."""
+    labels = sorted(counts)
+    return {"labels": labels, "values": [counts[k] for k in labels]}
+
+
+def amplitudes_data(state):
+    """Bar labels and |amplitude| heights of plot_statevector_amplitudes."""
+    amps = _amplitudes(state)
+    num_qubits = int(np.log2(len(amps)))
+    return {
+        "labels": [f"{i:0{num_qubits}b}" for i in range(len(amps))],
+        "values": np.abs(amps).tolist(),
+    }
+
+
+def city_data(rho: np.ndarray):
+    """Real and imaginary bar matrices of plot_state_city."""
+    return {"real": rho.real.tolist(), "imag": rho.imag.tolist()}
+
+
+def qsphere_data(state):
+    """
+    Points of plot_state_qsphere: one per basis state with non-negligible
+    probability, with the same sphere coordinates Qiskit draws and the
+    phase relative to the largest amplitude.
+    """
+    # Imported here: qiskit.visualization pulls in matplotlib
+    from qiskit.visualization.state_visualization import bit_string_index, n_choose_k
+
+    psi = _amplitudes(state)
+    d = int(np.log2(len(psi)))
+
+    # Remove the global phase of the largest amplitude, as Qiskit does
+    loc = np.round(np.abs(psi), decimals=13).argmax()
+    psi = psi * np.exp(-1j * np.angle(psi[loc]))
+
+    probs = np.abs(psi) ** 2
+    points = []
+    for i in np.nonzero(probs > QSPHERE_MIN_PROBABILITY)[0]:
+        element = format(int(i), f"0{d}b")
+        weight = element.count("1")
+        zvalue = -2 * weight / d + 1
+        number_of_divisions = n_choose_k(d, weight)
+        weight_order = bit_string_index(element)
+        angle = (weight / d) * (np.pi * 2) + weight_order * 2 * (np.pi / number_of_divisions)
+        if (weight > d / 2) or (weight == d / 2 and weight_order >= number_of_divisions / 2):
+            angle = np.pi - angle - (2 * np.pi / number_of_divisions)
+
+        points.append({
+            "label": element,
+            "probability": float(min(probs[i], 1.0)),
+            "phase": float(np.angle(psi[i]) % (2 * np.pi)),
+            "xyz": [
+                float(np.sqrt(1 - zvalue**2) * np.cos(angle)),
+                float(np.sqrt(1 - zvalue**2) * np.sin(angle)),
+                float(zvalue),
+            ],
+        })
+    return {"points": points}
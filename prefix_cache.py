@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import threading
+
+from result_cache import ResultCache, normalize_gate, normalize_initial_states
+
+# Memory for intermediate statevectors (least recently used dropped first)
+PREFIX_CACHE_BYTES = int(os.getenv("QSVM_PREFIX_CACHE_BYTES", str(128 * 1024 * 1024)))
+# Checkpoint every STRIDE-th prefix, plus the last TAIL prefixes of a circuit,
+# where edits usually happen
+PREFIX_CHECKPOINT_STRIDE = int(os.getenv("QSVM_PREFIX_CHECKPOINT_STRIDE", "8"))
+PREFIX_CHECKPOINT_TAIL = 4
+
+
+def prefix_keys(num_qubits, initial_states, gates) -> list:
+    """
+    keys[k] identifies the state after the first k gates: a hash chain over
+    (numQubits, initialStates) and each gate's canonical form.
+    """
+    h = hashlib.sha256(
+        f"{int(num_qubits)}|{normalize_initial_states(initial_states)}".encode()
+    ).hexdigest()
+    keys = [h]
+    for gate in gates:
+        blob = json.dumps(normalize_gate(gate), sort_keys=True, separators=(",", ":"))
+        h = hashlib.sha256((h + blob).encode()).hexdigest()
+        keys.append(h)
+    return keys
+
+
+def checkpoint_positions(num_gates: int) -> list:
+    """Prefix lengths whose state is kept after simulating num_gates gates."""
+    tail = range(max(num_gates - PREFIX_CHECKPOINT_TAIL + 1, 1), num_gates + 1)
+    return sorted(set(range(PREFIX_CHECKPOINT_STRIDE, num_gates + 1, PREFIX_CHECKPOINT_STRIDE)) | set(tail))
+
+
+class PrefixStateCache:
+    """
+    Statevectors after each checkpointed gate-list prefix. A request resumes
+    from its longest cached prefix and only simulates the remaining gates.
+    Storage is a byte-bounded LRU, so recently edited circuits stay.
+    """
+
+    def __init__(self, max_bytes: int = PREFIX_CACHE_BYTES):
+        self._states = ResultCache(max_bytes)
+        self._lock = threading.Lock()
+        self._counts = {"lookups": 0, "resumed": 0, "gates_reused": 0, "gates_applied": 0}
+
+    def longest_prefix(self, keys):
+        """(k, state) for the longest cached prefix keys[k], or (0, None)."""
+        for k in range(len(keys) - 1, 0, -1):
+            state = self._states.get("prefix", keys[k])
+            if state is not None:
+                return k, state
+        return 0, None
+
+    def put(self, key, state):
+        self._states.put("prefix", key, state)
+
+    def record(self, reused: int, applied: int):
+        with self._lock:
+            self._counts["lookups"] += 1
+            self._counts["resumed"] += reused > 0
+            self._counts["gates_reused"] += reused
+            self._counts["gates_applied"] += applied
+
+    def clear(self):
+        self._states.clear()
+
+    def stats(self):
+        storage = self._states.stats()
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            **counts,
+            "entries": storage["entries"],
+            "bytes": storage["bytes"],
+            "max_bytes": storage["max_bytes"],
+        }
+
+
+# Process-wide cache used by circuit_builder1.prefix_statevector
+PREFIX_CACHE = PrefixStateCache()
@@ -663,20 +663,11 @@ async function renderCircuitDiagram(payload) {
   }
 }
 
-async function renderStateAnalysis(payload) {
+function showStateAnalysis(data) {
   const resultsDiv = document.getElementById("results");
   resultsDiv.innerHTML = "<h2>Quantum State Analysis</h2>";
 
   try {
-    const res = await fetch("https://qsvm-backend.onrender.com/state-analysis", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    });
-
-    if (!res.ok) throw new Error("State analysis failed");
-
-    const data = await res.json();
     console.log("State Analysis Data:", data);
 
     // ---------- Statevector ----------
@@ -687,13 +678,15 @@ async function renderStateAnalysis(payload) {
       ),
     );
 
-    // ---------- Density Matrix ----------
-    resultsDiv.appendChild(
-      createMatrixSection(
-        "Density Matrix ρ",
-        formatComplexMatrix(data.density_matrix),
-      ),
-    );
+    // ---------- Density Matrix (only sent when requested) ----------
+    if (data.density_matrix) {
+      resultsDiv.appendChild(
+        createMatrixSection(
+          "Density Matrix ρ",
+          formatComplexMatrix(data.density_matrix),
+        ),
+      );
+    }
 
     // ---------- Reduced Density Matrices ----------
     for (const [qubit, matrix] of Object.entries(
@@ -864,16 +857,33 @@ async function onRun() {
   };
   console.log("👉 payload:", payload);
 
-  await renderStateAnalysis(payload);
-
   try {
-    // ---------- BLOCH ----------
-    const blochRes = await fetch("https://qsvm-backend.onrender.com/bloch", {
+    // One build + one simulation on the server for every visualization
+    const analyzeRes = await fetch("https://qsvm-backend.onrender.com/analyze", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
+      body: JSON.stringify({
+        ...payload,
+        // Full ρ grows as 4^n; the server refuses it beyond its qubit limit
+        includeDensityMatrix: nQ <= 6,
+        artifacts: [
+          "state-analysis",
+          "bloch",
+          "qsphere",
+          "bloch-all",
+          "counts",
+          "statevectorplot",
+          "statevector",
+        ],
+      }),
     });
-    const blochData = await blochRes.json();
+    if (!analyzeRes.ok) throw new Error("Analyze API error");
+    const analysis = await analyzeRes.json();
+
+    showStateAnalysis(analysis["state-analysis"]);
+
+    // ---------- BLOCH ----------
+    const blochData = analysis["bloch"];
 
     const blochImg = document.createElement("img");
     blochImg.src = "data:image/png;base64," + blochData.image;
@@ -886,12 +896,7 @@ async function onRun() {
     blochWrap.append(blochLabel, blochImg);
 
     // ---------- QSPHERE ----------
-    const qsRes = await fetch("https://qsvm-backend.onrender.com/qsphere", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    });
-    const qsData = await qsRes.json();
+    const qsData = analysis["qsphere"];
 
     const qsImg = document.createElement("img");
     qsImg.src = "data:image/png;base64," + qsData.image;
@@ -910,13 +915,7 @@ async function onRun() {
     container.append(blochWrap, qsWrap);
 
     // ---------- BLOCH ALL QUBITS ----------
-const blochAllRes = await fetch("https://qsvm-backend.onrender.com/bloch-all", {
-  method: "POST",
-  headers: { "Content-Type": "application/json" },
-  body: JSON.stringify(payload),
-});
-
-const blochAllData = await blochAllRes.json();
+const blochAllData = analysis["bloch-all"];
 
 // Section label
 const blochAllTitle = document.createElement("h3");
@@ -955,13 +954,7 @@ container.append(blochAllTitle, blochAllWrap);
 
 
     // ---------- COUNTS HISTOGRAM ----------
-    const countsRes = await fetch("https://qsvm-backend.onrender.com/counts", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    });
-
-    const countsData = await countsRes.json();
+    const countsData = analysis["counts"];
 
     // Create image
     const countsImg = document.createElement("img");
@@ -981,12 +974,7 @@ container.append(blochAllTitle, blochAllWrap);
     container.append(countsWrap);
 
     // ---------- HISTOGRAM ----------
-    const histRes = await fetch("https://qsvm-backend.onrender.com/statevectorplot", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    });
-    const histData = await histRes.json();
+    const histData = analysis["statevectorplot"];
 
     const canvas = document.getElementById("stateBarChart");
     const ctx = canvas.getContext("2d");
@@ -1007,13 +995,7 @@ container.append(blochAllTitle, blochAllWrap);
     img.src = "data:image/png;base64," + histData.image;
 
     //state city
-    const stateRes = await fetch("https://qsvm-backend.onrender.com/statevector", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    });
-
-    const stateData = await stateRes.json();
+    const stateData = analysis["statevector"];
 
     const stateImg = document.createElement("img");
     stateImg.src = "data:image/png;base64," + stateData.image;
@@ -0,0 +1,202 @@
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+# 0 workers renders inline (serialized by a lock) instead of in a pool
+RENDER_WORKERS = int(os.getenv("QSVM_RENDER_WORKERS", str(min(os.cpu_count() or 1, 4))))
+# Renders allowed in flight (running + queued) before callers are refused
+RENDER_QUEUE = int(os.getenv("QSVM_RENDER_QUEUE", str(4 * max(RENDER_WORKERS, 1))))
+RENDER_TIMEOUT = float(os.getenv("QSVM_RENDER_TIMEOUT", "30"))
+
+
+class RenderQueueFull(RuntimeError):
+    pass
+
+
+class RenderTimeout(RuntimeError):
+    pass
+
+
+# ---------- WORKER SIDE ----------
+
+def _init_worker():
+    """Import matplotlib and Qiskit's plotting once per worker process."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+    import qiskit.visualization  # noqa: F401
+
+
+def plot_statevector_amplitudes(state):
+    """
+    Plots |ψ⟩ amplitudes as a bar chart.
+    Returns a matplotlib Figure.
+    """
+    import matplotlib.pyplot as plt
+
+    amps = np.asarray(getattr(state, "data", state))
+    num_qubits = int(np.log2(len(amps)))
+    labels = [f"|{i:0{num_qubits}b}⟩" for i in range(len(amps))]
+
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.bar(labels, np.abs(amps))
+    ax.set_title("Statevector Amplitudes |ψ⟩")
+    ax.set_ylabel("Probability Amplitude")
+    ax.set_xlabel("Basis State")
+    plt.xticks(rotation=45)
+
+    return fig
+
+
+def _figure(kind: str, data, options: dict):
+    from qiskit.quantum_info import Statevector
+    from qiskit.visualization import (
+        plot_bloch_multivector,
+        plot_bloch_vector,
+        plot_histogram,
+        plot_state_city,
+        plot_state_qsphere,
+    )
+
+    if kind == "circuit":
+        return data.draw(output="mpl", **options)
+    if kind == "histogram":
+        return plot_histogram(data, **options)
+    if kind == "bloch_vector":
+        return plot_bloch_vector(data, **options)
+    if kind == "bloch_multivector":
+        return plot_bloch_multivector(Statevector(data), **options)
+    if kind == "qsphere":
+        return plot_state_qsphere(Statevector(data), **options)
+    if kind == "state_city":
+        return plot_state_city(Statevector(data), **options)
+    if kind == "statevector_amplitudes":
+        return plot_statevector_amplitudes(data)
+    raise ValueError(f"Unsupported plot kind: {kind}")
+
+
+def render_png(kind: str, data, options: dict | None = None) -> bytes:
+    """Render one plot spec to PNG bytes (runs inside a worker)."""
+    import matplotlib.pyplot as plt
+
+    fig = _figure(kind, data, options or {})
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+# ---------- SERVER SIDE ----------
+
+class RenderPool:
+    """
+    Warm worker processes that turn plot specs (kind, data, options) into
+    PNG bytes. pyplot state stays per process, so concurrent requests
+    never share a figure, and at most ``queue_size`` renders are in flight.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, queue_size=RENDER_QUEUE, timeout=RENDER_TIMEOUT):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._inline_lock = threading.Lock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending = 0
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: never fork a process that already runs server/Aer threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def warm_up(self):
+        """Start every worker now instead of on the first request."""
+        if self.workers == 0:
+            _init_worker()
+            return
+        executor = self._get_executor()
+        for f in [executor.submit(_init_worker) for _ in range(self.workers)]:
+            f.result()
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RenderQueueFull(f"Render queue full ({self.queue_size} in flight)")
+        with self._pending_lock:
+            self._pending += 1
+
+    def _release(self, *_):
+        with self._pending_lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def submit(self, kind: str, data, options: dict | None = None):
+        """Queue a render; returns a Future of PNG bytes."""
+        self._acquire()
+        try:
+            future = self._get_executor().submit(render_png, kind, data, options)
+        except BrokenProcessPool:
+            # A worker died: start a fresh pool and retry once
+            with self._executor_lock:
+                self._executor = None
+            try:
+                future = self._get_executor().submit(render_png, kind, data, options)
+            except BaseException:
+                self._release()
+                raise
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def render_many(self, specs) -> list:
+        """PNG bytes for each (kind, data, options) spec, rendered in parallel."""
+        if self.workers == 0:
+            with self._inline_lock:
+                return [render_png(*spec) for spec in specs]
+        futures = []
+        try:
+            for spec in specs:
+                futures.append(self.submit(*spec))
+            # One deadline for the whole batch, not self.timeout per plot
+            deadline = time.monotonic() + self.timeout
+            return [f.result(timeout=max(deadline - time.monotonic(), 0)) for f in futures]
+        except FuturesTimeout:
+            raise RenderTimeout(f"Rendering took longer than {self.timeout:g}s")
+        finally:
+            # No-op for finished futures; frees queue slots of unstarted ones
+            for f in futures:
+                f.cancel()
+
+    def render(self, kind: str, data, options: dict | None = None) -> bytes:
+        return self.render_many([(kind, data, options)])[0]
+
+    def stats(self):
+        return {"workers": self.workers, "queue_size": self.queue_size, "in_flight": self._pending}
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+# Process-wide pool used by app.py
+RENDER_POOL = RenderPool()
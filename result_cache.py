@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from gate_registry import lookup
+
+# Fixed seed so simulator counts are reproducible and therefore cacheable
+SIMULATOR_SEED = int(os.getenv("QSVM_SIMULATOR_SEED", "1234"))
+
+# Total memory budget shared by every entry kind
+CACHE_MAX_BYTES = int(os.getenv("QSVM_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+
+# ---------- CANONICAL KEYS ----------
+
+def _normalize_matrix(matrix):
+    if matrix is None:
+        return None
+    return [[[float(c.re), float(c.im)] for c in row] for row in matrix]
+
+
+def normalize_gate(gate):
+    """Plain, JSON-ready view of a Gate (pydantic model or circuit_builder1.Gate)."""
+    angle = getattr(gate, "angle", None)
+    # "Rx", "rx" and "RX" (and aliases like "CX") build the same gate
+    spec = lookup(gate.type)
+    normalized = {
+        "type": gate.type if spec is None else spec.name,
+        "name": getattr(gate, "name", None),
+        "customType": getattr(gate, "customType", None),
+        "params": [int(q) for q in (getattr(gate, "params", None) or [])],
+        "angle": None if angle is None else float(angle),
+        "matrix": _normalize_matrix(getattr(gate, "matrix", None)),
+        "subGates": [normalize_gate(sg) for sg in (getattr(gate, "subGates", None) or [])],
+    }
+    # Only present on parameterized (sweep) gates, so other keys are unchanged
+    if getattr(gate, "param", None) is not None:
+        normalized["param"] = gate.param
+    return normalized
+
+
+def normalize_initial_states(initial_states):
+    """'010', [0, 1, 0] and None all map to a plain bit string."""
+    if not initial_states:
+        return ""
+    return "".join(str(int(b)) for b in initial_states)
+
+
+def circuit_key(num_qubits, initial_states, gates) -> str:
+    """Content hash of a circuit payload; identical circuits share one key."""
+    canonical = {
+        "numQubits": int(num_qubits),
+        "initialStates": normalize_initial_states(initial_states),
+        "gates": [normalize_gate(g) for g in gates],
+    }
+    blob = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+# ---------- SIZE ESTIMATE ----------
+
+def _sizeof(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "outcomes") and hasattr(value, "nbytes"):
+        # counts_array.CountsArray
+        return value.nbytes
+    if hasattr(value, "data") and isinstance(value.data, np.ndarray):
+        # Statevector / DensityMatrix
+        return value.data.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# ---------- LRU CACHE ----------
+
+class ResultCache:
+    """
+    Thread-safe LRU keyed by (kind, key) with a memory budget in bytes.
+    Kinds keep statevectors, counts and derived artifacts apart in the stats.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = {}
+        self._misses = {}
+
+    def get(self, kind: str, key):
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                self._misses[kind] = self._misses.get(kind, 0) + 1
+                return None
+            self._entries.move_to_end((kind, key))
+            self._hits[kind] = self._hits.get(kind, 0) + 1
+            return entry[0]
+
+    def put(self, kind: str, key, value):
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            old = self._entries.pop((kind, key), None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[(kind, key)] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+        return value
+
+    def get_or_compute(self, kind: str, key, compute):
+        value = self.get(kind, key)
+        if value is None:
+            value = self.put(kind, key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            kinds = sorted(set(self._hits) | set(self._misses))
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "kinds": {
+                    k: {"hits": self._hits.get(k, 0), "misses": self._misses.get(k, 0)}
+                    for k in kinds
+                },
+            }
+
+
+# Process-wide cache used by app.py, circuit_builder1.py and Qiskit1.py
+RESULT_CACHE = ResultCache()
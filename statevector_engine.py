@@ -0,0 +1,119 @@
+"""
+Statevector simulation straight from payload gates with NumPy: no
+QuantumCircuit, no Qiskit operators on the hot path. The state is a flat
+little-endian complex128 array; gates act in place on views of it reshaped
+to one axis per qubit (qubit q is axis n-1-q).
+
+Anything this engine does not model the way build_circuit does raises
+UnsupportedGate, and the caller falls back to the Qiskit path (which then
+raises the same error it always did, for invalid input).
+"""
+import numpy as np
+
+from gate_registry import CONTROLLED, GATES, MATRIX, InvalidGate, compile_gates
+
+
+class UnsupportedGate(ValueError):
+    pass
+
+
+# ---------- KERNELS ----------
+
+def _apply_1q(t, n, m, target, controls=()):
+    """Apply 2x2 m to qubit ``target`` of tensor t, where all controls are 1."""
+    idx = [slice(None)] * n
+    for c in controls:
+        idx[n - 1 - c] = 1
+    # Trailing Ellipsis keeps a 0-d view (not a copy) when every axis is fixed
+    idx[n - 1 - target] = 0
+    a = t[(*idx, ...)]
+    idx[n - 1 - target] = 1
+    b = t[(*idx, ...)]
+
+    if m[0, 1] == 0 and m[1, 0] == 0:
+        if m[0, 0] != 1:
+            a *= m[0, 0]
+        if m[1, 1] != 1:
+            b *= m[1, 1]
+    elif m[0, 0] == 0 and m[1, 1] == 0:
+        a0 = a.copy()
+        np.multiply(b, m[0, 1], out=a)
+        np.multiply(a0, m[1, 0], out=b)
+    else:
+        a0 = a.copy()
+        a *= m[0, 0]
+        a += m[0, 1] * b
+        b *= m[1, 1]
+        b += m[1, 0] * a0
+
+
+def _apply_swap(t, n, q1, q2):
+    idx = [slice(None)] * n
+    idx[n - 1 - q1], idx[n - 1 - q2] = 0, 1
+    s01 = t[(*idx, ...)]
+    idx[n - 1 - q1], idx[n - 1 - q2] = 1, 0
+    s10 = t[(*idx, ...)]
+    tmp = s01.copy()
+    s01[...] = s10
+    s10[...] = tmp
+
+
+def _apply_unitary(psi, n, u, qubits):
+    """UnitaryGate semantics: qubits[0] is the least significant index bit."""
+    k = len(qubits)
+    if k == 1:
+        _apply_1q(psi.reshape((2,) * n), n, u, qubits[0])
+        return
+    t = psi.reshape((2,) * n)
+    axes = [n - 1 - q for q in reversed(qubits)]  # most significant first
+    out = np.tensordot(u.reshape((2,) * (2 * k)), t, axes=(list(range(k, 2 * k)), axes))
+    psi[:] = np.moveaxis(out, list(range(k)), axes).reshape(-1)
+
+
+# ---------- GATES ----------
+
+_SWAP = GATES["SWAP"]
+
+
+def apply_op(psi, n, op):
+    """Apply one gate_registry Op to psi in place."""
+    t = psi.reshape((2,) * n)
+    q = op.qubits
+    if op.kind == MATRIX:
+        _apply_unitary(psi, n, op.matrix, q)
+    elif op.kind == CONTROLLED:
+        _apply_1q(t, n, op.spec.unitary(op.angle), q[-1], q[:-1])
+    elif op.spec.base is not None:
+        _apply_1q(t, n, GATES[op.spec.base].matrix, q[-1], q[:-1])
+    elif op.spec is _SWAP:
+        _apply_swap(t, n, q[0], q[1])
+    else:
+        _apply_1q(t, n, op.spec.unitary(op.angle), q[0])
+
+
+# ---------- ENTRY POINTS ----------
+
+def initial_state(num_qubits, initial_states) -> np.ndarray:
+    """Basis state build_circuit prepares with X gates from initialStates."""
+    bits = [int(b) for b in (initial_states or [])]
+    if len(bits) > num_qubits:
+        raise UnsupportedGate("more initial states than qubits")
+    psi = np.zeros(2**num_qubits, dtype=complex)
+    psi[sum(1 << q for q, bit in enumerate(bits) if bit == 1)] = 1
+    return psi
+
+
+def apply_gates(psi: np.ndarray, num_qubits, gates) -> np.ndarray:
+    """Apply gates to psi in place and return it."""
+    try:
+        ops = compile_gates(num_qubits, gates)
+    except InvalidGate as e:
+        raise UnsupportedGate(str(e)) from e
+    for op in ops:
+        apply_op(psi, num_qubits, op)
+    return psi
+
+
+def simulate(num_qubits, initial_states, gates) -> np.ndarray:
+    """Pre-measurement amplitudes of the circuit build_circuit would build."""
+    return apply_gates(initial_state(num_qubits, initial_states), num_qubits, gates)
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from qiskit import QuantumCircuit, transpile
+
+from metrics import timed
+
+# Transpiled circuits kept (least recently used are dropped first)
+TRANSPILE_CACHE_ENTRIES = int(os.getenv("QSVM_TRANSPILE_CACHE_ENTRIES", "1024"))
+
+
+# ---------- CANONICAL KEYS ----------
+
+def _hash_operation(h, op):
+    h.update(f"{op.name}|{op.num_qubits}|{op.num_clbits}|".encode())
+    for p in op.params:
+        if isinstance(p, np.ndarray):
+            # UnitaryGate (and controlled unitaries) carry their matrix
+            h.update(np.ascontiguousarray(p, dtype=complex).tobytes())
+        else:
+            h.update(repr(p).encode())
+        h.update(b",")
+    if getattr(op, "ctrl_state", None) is not None:
+        h.update(f"ctrl={op.ctrl_state}|".encode())
+    base_gate = getattr(op, "base_gate", None)
+    if base_gate is not None:
+        h.update(b"base:")
+        _hash_operation(h, base_gate)
+
+
+def circuit_structure_hash(qc: QuantumCircuit) -> str:
+    """
+    Hash of what a circuit does (operations, parameters, wiring), not of
+    the Python object: separately built but identical circuits share it.
+    """
+    h = hashlib.sha256()
+    h.update(f"{qc.num_qubits}|{qc.num_clbits}|{qc.global_phase!r};".encode())
+    for instruction in qc.data:
+        _hash_operation(h, instruction.operation)
+        qubits = [qc.find_bit(q).index for q in instruction.qubits]
+        clbits = [qc.find_bit(c).index for c in instruction.clbits]
+        h.update(f"@{qubits}{clbits};".encode())
+    return h.hexdigest()
+
+
+def backend_identity(backend) -> tuple:
+    """What the transpiler targets: device name and size, plus Aer's method."""
+    options = getattr(backend, "options", None)
+    return (
+        type(backend).__name__,
+        backend.name,
+        backend.num_qubits,
+        getattr(options, "method", None),
+        getattr(options, "precision", None),
+    )
+
+
+# ---------- LRU CACHE ----------
+
+class TranspileCache:
+    """
+    Thread-safe LRU of transpiled circuits keyed by (circuit structure hash,
+    backend identity, optimization level). Cached circuits are shared, so
+    callers must treat them as read-only (running them is fine).
+    """
+
+    def __init__(self, max_entries: int = TRANSPILE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (circuit, seconds to transpile)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._transpile_seconds = 0.0
+        self._saved_seconds = 0.0
+
+    def transpile(self, circuits, backend, optimization_level=None):
+        """Drop-in for qiskit.transpile(circuits, backend, optimization_level)."""
+        single = isinstance(circuits, QuantumCircuit)
+        circuits = [circuits] if single else list(circuits)
+
+        target = backend_identity(backend)
+        keys = [(circuit_structure_hash(qc), target, optimization_level) for qc in circuits]
+        out = [None] * len(circuits)
+        missing = {}  # key -> indices, so duplicates in one call compile once
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing.setdefault(key, []).append(i)
+                    continue
+                self._entries.move_to_end(key)
+                self._hits += 1
+                self._saved_seconds += entry[1]
+                out[i] = entry[0]
+            self._misses += sum(len(idx) for idx in missing.values())
+
+        if missing:
+            todo = list(missing)
+            start = time.perf_counter()
+            with timed("transpile"):
+                compiled = transpile(
+                    [circuits[missing[key][0]] for key in todo],
+                    backend,
+                    optimization_level=optimization_level,
+                )
+            seconds = (time.perf_counter() - start) / len(todo)
+
+            with self._lock:
+                self._transpile_seconds += seconds * len(todo)
+                for key, tqc in zip(todo, compiled):
+                    for i in missing[key]:
+                        out[i] = tqc
+                    self._entries[key] = (tqc, seconds)
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return out[0] if single else out
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "transpile_seconds": self._transpile_seconds,
+                "saved_seconds": self._saved_seconds,
+            }
+
+
+# Process-wide cache used by circuit_builder1.py and Qiskit1.py
+TRANSPILE_CACHE = TranspileCache()
+
+
+def cached_transpile(circuits, backend, optimization_level=None):
+    return TRANSPILE_CACHE.transpile(circuits, backend, optimization_level)
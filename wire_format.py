@@ -0,0 +1,152 @@
+import io
+import json
+import struct
+
+import numpy as np
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+# msgpack is optional; without it the msgpack envelope is simply not offered
+try:
+    import msgpack
+
+    HAS_MSGPACK = True
+except Exception:
+    HAS_MSGPACK = False
+
+
+OCTET_STREAM = "application/octet-stream"   # one raw array, metadata in headers
+NPY = "application/x-npy"                   # one array, .npy file
+NPZ = "application/x-npz"                   # every array, uncompressed .npz
+MSGPACK = "application/msgpack"             # every array, {name: {shape, dtype, data}}
+# Streamed as produced, so the server never holds more than the arrays:
+NDJSON = "application/x-ndjson"             # per array a header line, then row chunks
+FRAMES = "application/x-qsvm-frames"        # per array <u4 length><JSON header><raw data>
+
+STREAM_MEDIA_TYPES = [NDJSON, FRAMES]
+BINARY_MEDIA_TYPES = [OCTET_STREAM, NPY, NPZ] + ([MSGPACK] if HAS_MSGPACK else []) + STREAM_MEDIA_TYPES
+
+# Elements per NDJSON line and bytes per streamed binary chunk
+STREAM_CHUNK_ELEMENTS = 8192
+STREAM_CHUNK_BYTES = 1 << 20
+
+# Little-endian complex dtypes clients may ask for
+COMPLEX_DTYPES = {
+    "complex64": np.dtype("<c8"),
+    "complex128": np.dtype("<c16"),
+}
+
+
+def negotiate(accept: str | None) -> str | None:
+    """First binary media type listed in the Accept header, or None for JSON."""
+    for part in (accept or "").split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in BINARY_MEDIA_TYPES:
+            return media_type
+    return None
+
+
+def _little_endian(arr: np.ndarray, dtype: str) -> np.ndarray:
+    arr = np.asarray(arr)
+    if np.iscomplexobj(arr):
+        if dtype not in COMPLEX_DTYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"dtype must be one of {sorted(COMPLEX_DTYPES)}",
+            )
+        target = COMPLEX_DTYPES[dtype]
+    else:
+        target = arr.dtype.newbyteorder("<")
+    # No-op (no copy) when the array already has the wire dtype
+    return np.ascontiguousarray(arr, dtype=target)
+
+
+def _buffer(arr: np.ndarray) -> memoryview:
+    """Zero-copy byte view of a contiguous array."""
+    return memoryview(arr.reshape(-1).view(np.uint8))
+
+
+def _header(name: str, arr: np.ndarray) -> dict:
+    return {"array": name, "shape": list(arr.shape), "dtype": arr.dtype.str}
+
+
+def _json_ready(chunk: np.ndarray):
+    if np.iscomplexobj(chunk):
+        return np.stack([chunk.real, chunk.imag], axis=-1).tolist()
+    return chunk.tolist()
+
+
+def _ndjson_lines(arrays: dict):
+    """
+    A header line per array, then lines of whole leading-axis entries
+    ({"array", "offset", "data"}; complex values as [re, im]) of about
+    STREAM_CHUNK_ELEMENTS elements, converted one chunk at a time.
+    """
+    for name, arr in arrays.items():
+        yield json.dumps(_header(name, arr)) + "\n"
+        if arr.ndim == 0:
+            arr = arr.reshape(1)
+        step = max(1, STREAM_CHUNK_ELEMENTS // max(1, arr[:1].size))
+        for offset in range(0, len(arr), step):
+            line = {"array": name, "offset": offset, "data": _json_ready(arr[offset:offset + step])}
+            yield json.dumps(line) + "\n"
+
+
+def _frames(arrays: dict):
+    """Per array: little-endian u4 header length, JSON header, raw buffer slices."""
+    for name, arr in arrays.items():
+        header = json.dumps({**_header(name, arr), "nbytes": arr.nbytes}).encode()
+        yield struct.pack("<I", len(header)) + header
+        buf = _buffer(arr)
+        for start in range(0, len(buf), STREAM_CHUNK_BYTES):
+            yield buf[start:start + STREAM_CHUNK_BYTES]
+
+
+def encode_arrays(arrays: dict, media_type: str, dtype: str = "complex128", array: str | None = None):
+    """
+    Binary Response for named NumPy arrays. Single-array formats send
+    ``array`` (default: the first one); the envelopes send all of them.
+    Buffers come straight from the arrays, never element by element.
+    The stream types are sent chunk by chunk while they are produced.
+    """
+    arrays = {name: _little_endian(a, dtype) for name, a in arrays.items()}
+
+    if media_type == NDJSON:
+        return StreamingResponse(_ndjson_lines(arrays), media_type=NDJSON)
+    if media_type == FRAMES:
+        return StreamingResponse(_frames(arrays), media_type=FRAMES)
+
+    if media_type in (OCTET_STREAM, NPY):
+        name = array or next(iter(arrays))
+        if name not in arrays:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown array {name!r}; available: {sorted(arrays)}",
+            )
+        arr = arrays[name]
+        headers = {
+            "X-Array-Name": name,
+            "X-Array-Shape": ",".join(str(d) for d in arr.shape),
+            "X-Array-Dtype": arr.dtype.str,
+        }
+        if media_type == OCTET_STREAM:
+            return Response(content=_buffer(arr), media_type=OCTET_STREAM, headers=headers)
+        buf = io.BytesIO()
+        np.lib.format.write_array(buf, arr, allow_pickle=False)
+        return Response(content=buf.getvalue(), media_type=NPY, headers=headers)
+
+    if media_type == NPZ:
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        return Response(content=buf.getvalue(), media_type=NPZ)
+
+    if media_type == MSGPACK:
+        envelope = {
+            name: {"shape": list(a.shape), "dtype": a.dtype.str, "data": _buffer(a)}
+            for name, a in arrays.items()
+        }
+        return Response(content=msgpack.packb(envelope), media_type=MSGPACK)
+
+    raise HTTPException(
+        status_code=406, detail=f"Supported binary types: {BINARY_MEDIA_TYPES}"
+    )